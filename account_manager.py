@@ -3,66 +3,78 @@ import os
 import logging
 from datetime import datetime
 from pathlib import Path
-from filelock import FileLock  
 from trade_reconciler import TransactionLogger
 tx_logger = TransactionLogger()
 from mt5.mt5service import MT5Service
-import json
-from mt5.EACommunicator_API import EACommunicator_API
+from mt5.EACommunicator_API import AsyncEACommunicator, AsyncEAGateway, EACommunicator_API
+from mt5.positions_cache import PositionsCache
+from account_store import ACCOUNT_FIELDNAMES, AccountStore, to_cents
+from distribution import allocate_pro_rata
+from storage.ticket_index import TicketIndex
+import numpy as np
+import storage
 
 import uuid
 
 
 
 logger = logging.getLogger(__name__)
+
+# "router" when ZmqCommunicator runs with RouterMode, letting async callers pipeline requests
+EA_SOCKET_MODE = os.getenv("EA_SOCKET_MODE", "req").lower()
+# Seconds an EA positions snapshot is shared before it is fetched again
+POSITIONS_TTL = float(os.getenv("POSITIONS_TTL", "5"))
+
+
 class AccountManager:
-    def __init__(self, csv_file="accounts.csv"):
+    def __init__(self, csv_file="accounts.csv", backend=None):
         self.data_dir = Path("data")
         self.data_dir.mkdir(exist_ok=True)
         self.csv_file = csv_file
-        self.lock = FileLock(f"{csv_file}.lock")
-        self.fieldnames = [
-            "telegram_id", "server", "user_id", "balance", 
-            "referral_id", "referrals", "referral_earnings","total_withdrawals","total_deposits",
-            "first_deposit", "first_deposit_date", "first_deposit_amount", "last_interest_date","total_interest", "referrer_id", "locked",
-            "mt5_allocation", "last_profit_date", "profit_share_rate", "last_profit_share"
-    ]
+        self.fieldnames = ACCOUNT_FIELDNAMES
+        self.store = AccountStore(backend or storage.account_backend(csv_file, self.fieldnames))
+        self.lock = self.store.lock
+        self.processed_tickets = TicketIndex(
+            str(self.data_dir / "processed_tickets.npy"), legacy_json="processed_trades.json"
+        )
         self.ea = EACommunicator_API()
         self.ea.Connect()
+        # For callers on the bot's event loop
+        self.ea_async = AsyncEAGateway() if EA_SOCKET_MODE == "router" else AsyncEACommunicator()
+        self.ea_async.Connect()
+        self.positions = PositionsCache(self.ea_async, ttl=POSITIONS_TTL)
 
     def _load_accounts(self):
-        try:
-            with self.lock:
-                if not os.path.exists(self.csv_file):
-                    with open(self.csv_file, "w", newline="") as f:
-                        writer = csv.DictWriter(f, fieldnames=self.fieldnames)
-                        writer.writeheader()             
-                        return []
-                
-                with open(self.csv_file, "r") as f:
-                    return list(csv.DictReader(f))
-        except Exception as e:
-            logger.error(f"Error loading accounts: {e}")
-            return []
+        return self.store.all()
 
     def _save_accounts(self, accounts):
         try:
-            with self.lock:
-                with open(self.csv_file, "w", newline="") as f:
-                    writer = csv.DictWriter(f, fieldnames=self.fieldnames)
-                    writer.writeheader()
-                    writer.writerows(accounts)
+            self.store.replace_all(accounts)
             return True
         except Exception as e:
             logger.error(f"Error saving accounts: {e}")
             return False
 
+    def flush(self):
+        """Write any pending account changes to disk (call on shutdown)"""
+        return self.store.flush()
+
+    def transaction(self):
+        """
+        Batch several account changes under one lock and commit them with one write.
+
+            with account_manager.transaction() as txn:
+                acc = txn.account(telegram_id)
+                acc.balance += 10
+
+        txn.committed tells whether the write succeeded; if it did not, the
+        changes are rolled back and nothing is written later.
+        """
+        return self.store.transaction()
+
     def get_account_info(self, telegram_id):
-        accounts = self._load_accounts()
-        for acc in accounts:
-            if acc["telegram_id"] == str(telegram_id):
-                return acc
-        return None
+        acc = self.store.get(telegram_id)
+        return acc.to_row() if acc else None
 
     def add_user_if_not_exists(self, telegram_id, server, user_id,referral_id=None):
         """
@@ -70,24 +82,23 @@ class AccountManager:
                 tuple: (success: bool, referrer_id: str or None, is_new_user: bool)
         """
         with self.lock:
-        
-            accounts = self._load_accounts()
             is_new_user = False
             referrer_telegram_id = None
 
             # Check if user exists first
-            existing_account = next((acc for acc in accounts if acc["telegram_id"] == str(telegram_id)), None)
+            existing_account = self.store.get(telegram_id)
             if existing_account:
                 # If account exists but has no referrer, and referral_id is provided
-                if not existing_account.get("referrer_id") and referral_id:
+                if not existing_account.referrer_id and referral_id:
                     referrer_telegram_id = self._get_telegram_id_from_referral_id(referral_id)
                    
                     if referrer_telegram_id:
-                        existing_account["referrer_id"] = referrer_telegram_id
-                        if not self._add_referral(referrer_telegram_id, accounts):
+                        existing_account.referrer_id = referrer_telegram_id
+                        self.store.mark_dirty(telegram_id)
+                        if not self._add_referral(referrer_telegram_id):
                             logger.error(f"Failed to add referral count for {referrer_telegram_id}")
                             return (False, None, False)
-                return (self._save_accounts(accounts), referrer_telegram_id, False)
+                return (True, referrer_telegram_id, False)
             
             #create a new account
             new_account = {
@@ -121,13 +132,13 @@ class AccountManager:
                 referrer_telegram_id = self._get_telegram_id_from_referral_id(referral_id)
                 if referrer_telegram_id:
                     new_account["referrer_id"] = referrer_telegram_id
-                    if not self._add_referral(referrer_telegram_id, accounts):
+                    if not self._add_referral(referrer_telegram_id):
                         logger.error(f"Failed to add referral count for {referrer_telegram_id}")
                         return (False, None, False)
                     
             
-            accounts.append(new_account)
-            return (self._save_accounts(accounts), referrer_telegram_id, is_new_user)
+            self.store.add(new_account)
+            return (True, referrer_telegram_id, is_new_user)
 
     def get_floating_pl(self):
         """Get current floating P/L from open positions"""
@@ -140,6 +151,37 @@ class AccountManager:
             logger.error(f"Error getting floating P/L: {e}")
             return 0.0
         
+    async def get_positions_snapshot(self):
+        """Shared positions snapshot, marked stale past POSITIONS_TTL; None if the EA was never reached"""
+        try:
+            return await self.positions.get()
+        except Exception as e:
+            logger.error(f"Error refreshing positions: {e}")
+            return self.positions.latest()
+
+    async def refresh_positions(self):
+        """Scheduled every POSITIONS_TTL so handlers find a fresh snapshot"""
+        try:
+            await self.positions.refresh()
+        except Exception as e:
+            logger.error(f"Error refreshing positions: {e}")
+
+    async def get_floating_pl_async(self):
+        """get_floating_pl from the shared snapshot, without blocking the event loop"""
+        snapshot = await self.get_positions_snapshot()
+        return snapshot.floating_pl if snapshot else 0.0
+
+    async def get_closed_pl_async(self):
+        """get_closed_pl from the shared snapshot, without blocking the event loop"""
+        snapshot = await self.get_positions_snapshot()
+        return snapshot.closed_pl if snapshot else 0.0
+
+    async def get_current_equity_async(self, telegram_id):
+        """get_current_equity from the shared snapshot"""
+        if not self.store.get(telegram_id):
+            return 0.0
+        return self.get_balance(telegram_id) + await self.get_floating_pl_async()
+
     def record_trade(self, trade_data):
         """Record a trade in the history"""
         fieldnames = ["timestamp", "ticket", "symbol", "type", "volume", 
@@ -204,104 +246,134 @@ class AccountManager:
             logger.error(f"Error getting closed P/L: {e}")
             return 0.0    
 
-    @staticmethod
-    def get_processed_trades():
-        try:
-            with open('processed_trades.json', 'r') as f:
-                return set(json.load(f).get('processed_tickets', []))
-        except (FileNotFoundError, json.JSONDecodeError):
-            return set()
-        
-    @staticmethod
-    def save_processed_trades(trade_ids):
-        data = {'processed_tickets': list(trade_ids)}
-        with open('processed_trades.json', 'w') as f:
-            json.dump(data, f)
+    def is_processed(self, tickets):
+        """Boolean array telling which tickets have already been distributed"""
+        return self.processed_tickets.contains(tickets)
+
+    def mark_processed(self, tickets):
+        return self.processed_tickets.add(tickets)
 
     def get_current_equity(self, telegram_id):
         """Calculate current equity (balance + floating P/L)"""
-        account = self.get_account_info(telegram_id)
-        if not account:
+        if not self.store.get(telegram_id):
             return 0.0
             
-        balance = float(account.get('balance', 0))
-        return balance + self.get_floating_pl()
+        return self.get_balance(telegram_id) + self.get_floating_pl()
     
 
     
     def process_deposit(self, telegram_id: str, amount: float) -> bool:
         """Handle new deposits"""
-        accounts = self._load_accounts()
-        for acc in accounts:
-            if acc["telegram_id"] == str(telegram_id):
-                # Apply 10% fee
-                net_amount = amount * 0.90
-                
-                # Update balance
-                current = float(acc["balance"])
-                acc["balance"] = f"{current + net_amount:.2f}"
-                
+        with self.transaction() as txn:
+            acc = txn.account(telegram_id)
+            if not acc:
+                return False
+            self._apply_deposit(acc, amount)
+        return txn.committed
 
-                
-                # First deposit handling
-                if acc["first_deposit"] == "0":
-                    acc["first_deposit"] = "1"
-                    acc["first_deposit_amount"] = f"{amount:.2f}"  
-                    acc["first_deposit_date"] = datetime.now().strftime("%Y-%m-%d")
-                    # current_deposits = float(acc.get("total_deposits") or 0)
-                    # acc["total_deposits"] = f"{net_amount:.2f}"
-                
-                
-                current_deposits = float(acc.get("total_deposits")or 0)
-                acc["total_deposits"] = f"{current_deposits + net_amount:.2f}"
-                
-                saved = self._save_accounts(accounts)
-                if not saved:
-                    print(f"❌ Failed to save updated account for {telegram_id}")
-                return saved
-            
-        return False
+    def _apply_deposit(self, acc, amount):
+        # Apply 10% fee
+        net_amount = amount * 0.90
+        acc.balance += net_amount
 
+        # First deposit handling
+        if acc.first_deposit == "0":
+            acc.first_deposit = "1"
+            acc.first_deposit_amount = amount
+            acc.first_deposit_date = datetime.now().strftime("%Y-%m-%d")
 
-    def distribute_profits(self, current_mt5_balance: float) -> bool:
-        
-        accounts = self._load_accounts()
-        total_deposits = self.get_total_deposits()
-        total_withdrawals = self.get_total_withdrawals()
-        
-        # Calculate net profit pool
-        balance1 = current_mt5_balance - total_deposits - total_withdrawals
-        
-        updated = False
-        for acc in accounts:
-            user_deposits = float(acc.get("total_deposits", 0))
-            user_withdrawals = float(acc.get("total_withdrawals", 0))
-            
-            if user_deposits > 0:  # Only users who deposited
-                # Calculate individual profit share
-                individual_profit = (user_deposits / total_deposits) * balance1
-                
-                # Calculate new balance
-                if (user_deposits - user_withdrawals) > 0:
-                    new_balance = individual_profit + user_deposits - user_withdrawals
-                else:
-                    new_balance = individual_profit - abs(user_deposits - user_withdrawals)
-                
-                # Update account
-                acc["balance"] = f"{new_balance:.2f}"
-                
-                # Track profits
-                if individual_profit > 0:
-                    current_interest = float(acc.get("total_interest", 0))
-                    acc["total_interest"] = f"{current_interest + individual_profit:.2f}"
-                
-                acc["last_profit_date"] = datetime.now().strftime("%Y-%m-%d")
-                updated = True
-        
-        if updated:
-            return self._save_accounts(accounts)
+        acc.total_deposits += net_amount
+
+    def approve_deposit(self, telegram_id, amount):
+        """
+        Credit an approved deposit and the referrer's bonus in one transaction.
+            Returns:
+                tuple: (new_balance: float, referrer_id: str or None), or None on failure
+        """
+        with self.transaction() as txn:
+            acc = txn.account(telegram_id)
+            if not acc:
+                return None
+            self._apply_deposit(acc, amount)
+
+            referrer = txn.account(acc.referrer_id) if acc.referrer_id else None
+            if referrer:
+                bonus = self._apply_referral_bonus(referrer, amount)
+
+        if not txn.committed:
+            return None
+        if referrer:
+            self._log_referral_bonus(referrer.telegram_id, bonus)
+        return acc.balance, referrer.telegram_id if referrer else None
+
+    def approve_withdrawal(self, telegram_id, amount):
+        """Debit an approved withdrawal and record it in total_withdrawals"""
+        with self.transaction() as txn:
+            acc = txn.account(telegram_id)
+            if not acc:
+                logger.warning(f"Account {telegram_id} not found")
+                return False
+            if acc.balance - amount < 0:
+                logger.warning(f"Insufficient balance for {telegram_id}")
+                return False
+            acc.balance -= amount
+            acc.total_withdrawals += amount
+        return txn.committed
+
+
+    def mark_first_deposit(self, telegram_id, amount):
+        with self.lock:
+            acc = self.store.get(telegram_id)
+            if acc:
+                acc.first_deposit = "1"
+                acc.first_deposit_date = datetime.now().strftime("%Y-%m-%d")
+                acc.first_deposit_amount = to_cents(amount)
+                self.store.mark_dirty(telegram_id)
+                return True
         return False
 
+    def distribute_profits(self, current_mt5_balance: float) -> bool:
+        with self.lock:
+            ids, cols = self.store.columns("balance", "total_deposits", "total_withdrawals")
+            depositors = cols["total_deposits"] > 0  # Only users who deposited
+            if not depositors.any():
+                return False
+
+            # Net profit pool, shared by deposits
+            balance1 = to_cents(current_mt5_balance) - int(cols["total_deposits"].sum()) - int(cols["total_withdrawals"].sum())
+            individual_profit = allocate_pro_rata(cols["total_deposits"][depositors], balance1)
+
+            # New balance is the profit share plus net deposits
+            new_balance = (individual_profit + cols["total_deposits"][depositors]
+                           - cols["total_withdrawals"][depositors])
+            return self.store.apply_cents(
+                ids[depositors],
+                {
+                    "balance": new_balance - cols["balance"][depositors],
+                    "total_interest": np.maximum(individual_profit, 0)
+                },
+                last_profit_date=datetime.now().strftime("%Y-%m-%d")
+            )
+
+    def share_closed_pl(self, closed_pl: float):
+        """
+        Split realised P/L across every positive balance, pro rata and exact to the cent.
+            Returns:
+                bool or None: whether the write succeeded, None if no one holds a balance
+        """
+        with self.lock:
+            ids, cols = self.store.columns("balance")
+            holders = cols["balance"] > 0
+            if not holders.any():
+                return None
+
+            shares = allocate_pro_rata(cols["balance"][holders], to_cents(closed_pl))
+            return self.store.apply_cents(
+                ids[holders],
+                {"balance": shares, "total_interest": shares},
+                last_profit_date=datetime.now().strftime("%Y-%m-%d")
+            )
+
 
     def _generate_referral_id(self, telegram_id):
         # Last 4 digits of Telegram ID + short random code
@@ -309,29 +381,19 @@ class AccountManager:
         return f"REF{str(telegram_id)[-4:]}{random_part}"
 
     def _get_telegram_id_from_referral_id(self, referral_id: str) -> str:
-        referral_id = referral_id.strip().upper()
-        for acc in self._load_accounts():
-            if acc.get("referral_id", "").strip().upper() == referral_id:
-                return acc["telegram_id"]
-        return None
+        return self.store.find_by_referral(referral_id)
 
 
 
-    def _add_referral(self, referrer_id, accounts=None):
+    def _add_referral(self, referrer_id):
         """Add referral count to referrer's account"""
         logger.info(f"Adding referral for {referrer_id}")
         try:
-            # Use passed accounts or load fresh copy
-            accounts_to_update = accounts if accounts is not None else self._load_accounts()
-            
-            for acc in accounts_to_update:
-                if acc["telegram_id"] == str(referrer_id):
-                    current_refs = int(acc.get("referrals", "0"))
-                    acc["referrals"] = str(current_refs + 1)
-                    
-                    # Only save if we loaded accounts ourselves
-                    if accounts is None:
-                        return self._save_accounts(accounts_to_update)
+            with self.lock:
+                acc = self.store.get(referrer_id)
+                if acc:
+                    acc.referrals += 1
+                    self.store.mark_dirty(referrer_id)
                     return True
                     
             return False
@@ -346,7 +408,7 @@ class AccountManager:
         
         for acc in accounts:
             if acc.get("referrer_id"):
-                referrer = next((a for a in accounts if a["telegram_id"] == acc["referrer_id"]), None)
+                referrer = self.get_account_info(acc["referrer_id"])
                 if referrer and str(acc["telegram_id"]) not in referrer.get("referral_details", ""):
                     inconsistencies.append({
                         "user": acc["telegram_id"],
@@ -357,30 +419,32 @@ class AccountManager:
         return inconsistencies    
 
     def add_referral_earning(self, referrer_id, amount):
-        accounts = self._load_accounts()
-        for acc in accounts:
-            if acc["telegram_id"] == str(referrer_id):
-                # Calculate 2% bonus
-                bonus = amount * 0.02
-
-                # Update referral earnings
-                current_earnings = float(acc.get("referral_earnings", "0"))
-                acc["referral_earnings"] = str(round(current_earnings + bonus, 2))
-                # Update main balance
-                current_balance = float(acc.get("balance", "0"))
-                acc["balance"] = str(round(current_balance + bonus, 2))
-                
-                tx_logger.log_trade(
-                    user_id=str(referrer_id),
-                    tx_type="REFERRAL",
-                    amount=bonus,
-                    status="COMPLETED",
-                    related_user=str(referrer_id),
-                    notes=f"Bonus from approved referral deposit"
-                )
-
-                return self._save_accounts(accounts)
-        return False
+        with self.transaction() as txn:
+            acc = txn.account(referrer_id)
+            if not acc:
+                return False
+            bonus = self._apply_referral_bonus(acc, amount)
+
+        if txn.committed:
+            self._log_referral_bonus(referrer_id, bonus)
+        return txn.committed
+
+    def _apply_referral_bonus(self, acc, amount):
+        # Calculate 2% bonus
+        bonus = amount * 0.02
+        acc.referral_earnings += bonus
+        acc.balance += bonus
+        return bonus
+
+    def _log_referral_bonus(self, referrer_id, bonus):
+        tx_logger.log_trade(
+            user_id=str(referrer_id),
+            tx_type="REFERRAL",
+            amount=bonus,
+            status="COMPLETED",
+            related_user=str(referrer_id),
+            notes=f"Bonus from approved referral deposit"
+        )
     
 
     def get_referral_info(self, telegram_id):
@@ -563,12 +627,12 @@ class AccountManager:
 
     def calculate_user_balance(self, telegram_id):
         """Calculate balance using MQL-style formula"""
-        account = self.get_account_info(telegram_id)
+        account = self.store.get(telegram_id)
         if not account:
             return 0.0
             
-        total_deposits = float(account.get("total_deposits", 0))
-        user_withdrawals = float(account.get("total_withdrawals", 0))
+        total_deposits = account.total_deposits / 100
+        user_withdrawals = account.total_withdrawals / 100
         
         # Get system totals
         sys_total_deposits = self.get_total_deposits()
@@ -592,14 +656,12 @@ class AccountManager:
     
     def update_balance(self, telegram_id, amount, apply_fee=False):
         try:
-            accounts = self._load_accounts()
-            for acc in accounts:
-                if acc["telegram_id"] == str(telegram_id):
-                    current = float(acc["balance"])
-
+            with self.lock:
+                acc = self.store.get(telegram_id)
+                if acc:
                     # Apply 10% deduction if requested
                     net_amount = amount * 0.90 if apply_fee else amount
-                    new_balance = current + net_amount
+                    new_balance = acc.balance + to_cents(net_amount)
 
 
                     if new_balance < 0:
@@ -608,23 +670,19 @@ class AccountManager:
                     
 
                     # Check and set first deposit details 
-                    if float(acc.get("first_deposit", "0")) == 0 and amount > 0:
-                        acc["first_deposit"] = f"{amount:.2f}"
-                        acc["first_deposit_amount"] = f"{amount:.2f}"
-                        acc["first_deposit_date"] = datetime.utcnow().strftime("%Y-%m-%d")
+                    if to_cents(acc.first_deposit) == 0 and amount > 0:
+                        acc.first_deposit = f"{amount:.2f}"
+                        acc.first_deposit_amount = to_cents(amount)
+                        acc.first_deposit_date = datetime.utcnow().strftime("%Y-%m-%d")
 
                      # ✅ Update total_deposits if it's a deposit
                     # if amount > 0:
                     #     current_deposits = float(acc.get("total_deposits") or 0)
                     #     acc["total_deposits"] = f"{current_deposits + net_amount:.2f}"
 
-                    # Preserve all existing fields while updating balance
-                    updated_account = {
-                        **acc,  # Keeps all existing fields
-                        "balance": f"{new_balance:.2f}"
-                    }
-                    accounts[accounts.index(acc)] = updated_account
-                    return self._save_accounts(accounts)
+                    acc.balance = new_balance
+                    self.store.mark_dirty(telegram_id)
+                    return True
 
             logger.warning(f"Account {telegram_id} not found")
             return False
@@ -636,90 +694,89 @@ class AccountManager:
     
     def update_profit_share(self, telegram_id: str, amount: float) -> bool:
         """Credit profit share to user"""
-        accounts = self._load_accounts()
-        for acc in accounts:
-            if acc["telegram_id"] == str(telegram_id):
+        with self.lock:
+            acc = self.store.get(telegram_id)
+            if acc:
                 # Update balance
-                current = float(acc["balance"])
-                acc["balance"] = f"{current + amount:.2f}"
+                cents = to_cents(amount)
+                acc.balance += cents
                 
                 # Update tracking fields
-                acc["last_profit_date"] = datetime.now().strftime("%Y-%m-%d")
-                current_interest = float(acc.get("total_interest", 0))
-                acc["total_interest"] = f"{current_interest + amount:.2f}"
+                acc.last_profit_date = datetime.now().strftime("%Y-%m-%d")
+                acc.total_interest += cents
                 
-                return self._save_accounts(accounts)
+                self.store.mark_dirty(telegram_id)
+                return True
         return False
 
   
     def decrease_balance(self, telegram_id, amount):
         try:
-            accounts = self._load_accounts()
-            for acc in accounts:
-                if acc["telegram_id"] == str(telegram_id):
-                    current = float(acc["balance"])
-                    if current < amount:
+            with self.lock:
+                acc = self.store.get(telegram_id)
+                if acc:
+                    cents = to_cents(amount)
+                    if acc.balance < cents:
                         logger.warning(f"Insufficient balance for {telegram_id}")
                         return False
-                    acc["balance"] = f"{current - amount:.2f}"
-                    return self._save_accounts(accounts)
+                    acc.balance -= cents
+                    self.store.mark_dirty(telegram_id)
+                    return True
             return False
         except Exception as e:
             logger.error(f"Error decreasing balance: {e}")
             return False
       
     def set_balance(self, telegram_id, new_balance):
-        accounts = self._load_accounts()
-        for acc in accounts:
-            if acc["telegram_id"] == str(telegram_id):
-                acc["balance"] = f"{new_balance:.2f}"
-                self._save_accounts(accounts)
+        with self.lock:
+            acc = self.store.get(telegram_id)
+            if acc:
+                acc.balance = to_cents(new_balance)
+                self.store.mark_dirty(telegram_id)
                 return True
         return False
 
     def get_balance(self, telegram_id):
-        account = self.get_account_info(telegram_id)
-        return float(account["balance"]) if account else 0.0
+        account = self.store.get(telegram_id)
+        return account.balance / 100 if account else 0.0
     
     def get_total_deposits(self):
-        accounts = self._load_accounts()
-        return sum(float(acc.get("total_deposits", 0)) for acc in accounts)
+        return self.store.total("total_deposits")
 
     def get_total_withdrawals(self):
-        accounts = self._load_accounts()
-        return sum(float(acc.get("total_withdrawals", 0)) for acc in accounts)
+        return self.store.total("total_withdrawals")
+
+    def get_total_balance(self):
+        return self.store.total("balance")
+
+    def verify_totals(self):
+        """Periodic check of the running pool totals against a full recompute"""
+        return self.store.verify_totals()
 
     def update_total_withdrawals(self, telegram_id, amount):
         try:
-            accounts = self._load_accounts()
-            for acc in accounts:
-                if acc["telegram_id"] == str(telegram_id):
-                    current_withdrawals = float(acc.get("total_withdrawals", 0))
-                    
-                    # Preserve all existing fields while updating withdrawals
-                    updated_account = {
-                        **acc,  # Keep all existing fields
-                        "total_withdrawals": f"{current_withdrawals + amount:.2f}"
-                    }
-                    accounts[accounts.index(acc)] = updated_account
-                    return self._save_accounts(accounts)
+            with self.lock:
+                acc = self.store.get(telegram_id)
+                if acc:
+                    acc.total_withdrawals += to_cents(amount)
+                    self.store.mark_dirty(telegram_id)
+                    return True
             return False
         except Exception as e:
             logger.error(f"Error updating total withdrawals: {e}")
             return False
     
     def lock_funds(self, user_id: str, amount: float):
-        accounts = self._load_accounts()
-        for acc in accounts:
-            if acc['telegram_id'] == user_id:
-                if float(acc['balance']) >= amount:
-                    acc['locked'] = str(float(acc.get('locked', 0)) + amount)
-                    self._save_accounts(accounts)
-                    return True
+        with self.lock:
+            acc = self.store.get(user_id)
+            cents = to_cents(amount)
+            if acc and acc.balance >= cents:
+                acc.locked += cents
+                self.store.mark_dirty(user_id)
+                return True
         return False
     def get_locked_funds(self, user_id: str) -> float:
-        accounts = self._load_accounts()
-        for acc in accounts:
-            if acc['telegram_id'] == user_id:
-                return float(acc.get('locked', 0))
+        acc = self.store.get(user_id)
+        if acc:
+            return acc.locked / 100
         return 0.0
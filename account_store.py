@@ -0,0 +1,408 @@
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from operator import attrgetter
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ACCOUNT_FIELDNAMES = [
+    "telegram_id", "server", "user_id", "balance", 
+    "referral_id", "referrals", "referral_earnings","total_withdrawals","total_deposits",
+    "first_deposit", "first_deposit_date", "first_deposit_amount", "last_interest_date","total_interest", "referrer_id", "locked",
+    "mt5_allocation", "last_profit_date", "profit_share_rate", "last_profit_share"
+]
+
+# Money is held as integer cents, counts as ints, everything else as text
+MONEY_FIELDS = frozenset([
+    "balance", "referral_earnings", "total_withdrawals", "total_deposits",
+    "first_deposit_amount", "total_interest", "locked", "mt5_allocation"
+])
+COUNT_FIELDS = frozenset(["referrals"])
+
+# Pool-wide sums kept up to date on every mutation
+AGGREGATE_FIELDS = ("balance", "total_deposits", "total_withdrawals")
+_aggregates = attrgetter(*AGGREGATE_FIELDS)
+
+
+def to_cents(value):
+    """Parse a money amount (string or number) into integer cents"""
+    try:
+        return int(round(float(value or 0) * 100))
+    except ValueError:
+        return 0
+
+
+def format_cents(cents):
+    sign = "-" if cents < 0 else ""
+    return f"{sign}{abs(cents) // 100}.{abs(cents) % 100:02d}"
+
+
+def _to_count(value):
+    try:
+        return int(float(value or 0))
+    except ValueError:
+        return 0
+
+
+_FORMATTERS = {
+    field: format_cents if field in MONEY_FIELDS else str
+    for field in ACCOUNT_FIELDNAMES
+}
+
+
+class AccountRecord:
+    """One account with typed fields: money in cents, counts as ints, the rest text.
+
+    Strings are only parsed in from_row() and produced again by get() and
+    to_row(), at the storage and UI boundaries.
+    """
+
+    __slots__ = tuple(ACCOUNT_FIELDNAMES)
+
+    @classmethod
+    def from_row(cls, row):
+        record = cls.__new__(cls)
+        for field in ACCOUNT_FIELDNAMES:
+            record[field] = row.get(field)
+        return record
+
+    def __setitem__(self, field, value):
+        if field in MONEY_FIELDS:
+            value = to_cents(value)
+        elif field in COUNT_FIELDS:
+            value = _to_count(value)
+        else:
+            value = "" if value is None else str(value)
+        setattr(self, field, value)
+
+    def __getitem__(self, field):
+        try:
+            return _FORMATTERS[field](getattr(self, field))
+        except KeyError:
+            raise KeyError(field) from None
+
+    def get(self, field, default=""):
+        """String value of field, as it is written to storage"""
+        formatter = _FORMATTERS.get(field)
+        return default if formatter is None else formatter(getattr(self, field))
+
+    def to_row(self):
+        return {field: self[field] for field in ACCOUNT_FIELDNAMES}
+
+    def copy(self):
+        record = AccountRecord.__new__(AccountRecord)
+        record.update(self)
+        return record
+
+    def update(self, other):
+        for field in self.__slots__:
+            setattr(self, field, getattr(other, field))
+
+    def __eq__(self, other):
+        if not isinstance(other, AccountRecord):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.__slots__)
+
+    def __repr__(self):
+        return f"AccountRecord(telegram_id={self.telegram_id!r}, balance={self['balance']})"
+
+
+class _Money:
+    """Account field stored in cents, exposed as a float"""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, handle, owner=None):
+        if handle is None:
+            return self
+        return getattr(handle.record, self.name) / 100
+
+    def __set__(self, handle, value):
+        setattr(handle.record, self.name, to_cents(value))
+
+
+class _Field(_Money):
+    """Count or text field, passed through as is"""
+
+    def __get__(self, handle, owner=None):
+        if handle is None:
+            return self
+        return getattr(handle.record, self.name)
+
+    def __set__(self, handle, value):
+        handle.record[self.name] = value
+
+
+class AccountHandle:
+    """Typed, mutable view of one account inside a transaction"""
+
+    balance = _Money()
+    total_deposits = _Money()
+    total_withdrawals = _Money()
+    total_interest = _Money()
+    referral_earnings = _Money()
+    first_deposit_amount = _Money()
+    locked = _Money()
+    referrals = _Field()
+    referral_id = _Field()
+    referrer_id = _Field()
+    first_deposit = _Field()
+    first_deposit_date = _Field()
+    last_profit_date = _Field()
+
+    def __init__(self, record):
+        self.record = record
+
+    @property
+    def telegram_id(self):
+        return self.record.telegram_id
+
+
+class AccountTransaction:
+    """Changes staged on copies of the rows, applied together on commit"""
+
+    def __init__(self, store):
+        self.store = store
+        self.committed = False
+        self._handles = {}
+
+    def account(self, telegram_id):
+        """Return a handle for telegram_id, or None if there is no such account"""
+        telegram_id = str(telegram_id)
+        if telegram_id not in self._handles:
+            record = self.store.get(telegram_id)
+            self._handles[telegram_id] = AccountHandle(record.copy()) if record else None
+        return self._handles[telegram_id]
+
+    def accounts(self):
+        return [self.account(telegram_id) for telegram_id in self.store.ids()]
+
+    def commit(self):
+        previous = {}
+        for handle in self._handles.values():
+            if handle is None:
+                continue
+            record = self.store.get(handle.telegram_id)
+            if record != handle.record:
+                previous[handle.telegram_id] = record.copy()
+                record.update(handle.record)
+                self.store.mark_dirty(handle.telegram_id)
+        self.committed = self.store.flush()
+        if not self.committed:
+            # Callers report a failed commit and may retry it, so it must not be applied later
+            self.store.rollback(previous)
+        return self.committed
+
+
+class AccountStore:
+    """Resident copy of the accounts as AccountRecords, indexed by telegram_id.
+
+    Rows are loaded from the storage backend once on startup. Reads are
+    served from memory and mutations only mark rows dirty; dirty rows are
+    handed to the backend by a debounced background flush, or immediately
+    through flush().
+    """
+
+    def __init__(self, backend, flush_delay=2.0):
+        self.backend = backend
+        self.flush_delay = flush_delay
+        self.lock = threading.RLock()
+        self._accounts = {}
+        self._by_referral = {}
+        self._contributions = {}
+        self._totals = dict.fromkeys(AGGREGATE_FIELDS, 0)
+        self._dirty = set()
+        self._deleted = set()
+        self._timer = None
+        self._load()
+        atexit.register(self.flush)
+
+    def _load(self):
+        for row in self.backend.load():
+            self._index(row)
+        logger.info(f"Loaded {len(self._accounts)} accounts from {type(self.backend).__name__}")
+
+    def _index(self, row):
+        record = row if isinstance(row, AccountRecord) else AccountRecord.from_row(row)
+        telegram_id = record.telegram_id
+        previous = self._accounts.get(telegram_id)
+        if previous is not None:
+            # The replaced row's referral code must stop resolving to this account
+            old_referral_id = previous.referral_id.strip().upper()
+            if self._by_referral.get(old_referral_id) == telegram_id:
+                del self._by_referral[old_referral_id]
+        self._accounts[telegram_id] = record
+        referral_id = record.referral_id.strip().upper()
+        if referral_id:
+            self._by_referral[referral_id] = telegram_id
+        self._track(telegram_id)
+        return telegram_id
+
+    def _track(self, telegram_id):
+        """Move one row's contribution to the running totals to its current values"""
+        record = self._accounts.get(telegram_id)
+        old = self._contributions.pop(telegram_id, None)
+        new = _aggregates(record) if record else None
+        for i, field in enumerate(AGGREGATE_FIELDS):
+            self._totals[field] += (new[i] if new else 0) - (old[i] if old else 0)
+        if new:
+            self._contributions[telegram_id] = new
+
+    def get(self, telegram_id):
+        """Return the live AccountRecord for telegram_id, or None"""
+        return self._accounts.get(str(telegram_id))
+
+    def find_by_referral(self, referral_id):
+        """Return the telegram_id owning referral_id, or None"""
+        return self._by_referral.get(referral_id.strip().upper())
+
+    def total(self, field):
+        """Sum of field over all accounts, in O(1)"""
+        return self._totals[field] / 100
+
+    def verify_totals(self):
+        """Check the running totals against a full recompute, resetting them on drift"""
+        with self.lock:
+            contributions = {
+                telegram_id: _aggregates(record)
+                for telegram_id, record in self._accounts.items()
+            }
+            expected = {
+                field: sum(values[i] for values in contributions.values())
+                for i, field in enumerate(AGGREGATE_FIELDS)
+            }
+            if expected == self._totals:
+                return True
+
+            logger.warning(f"Account totals drifted (running {self._totals}, recomputed {expected}), resetting")
+            self._contributions = contributions
+            self._totals = expected
+            return False
+
+    def columns(self, *fields):
+        """Snapshot money/count fields as int64 arrays, aligned with an array of ids"""
+        with self.lock:
+            records = list(self._accounts.values())
+            ids = np.array([record.telegram_id for record in records], dtype=object)
+            return ids, {
+                field: np.fromiter((getattr(record, field) for record in records), dtype=np.int64, count=len(records))
+                for field in fields
+            }
+
+    def apply_cents(self, ids, deltas, **values):
+        """
+        Add per-account deltas (in cents) to money fields and set plain values, in bulk.
+
+        deltas maps a field to an array aligned with ids; values are set as
+        they are, in cents for money fields. The changes are flushed with a
+        single write; returns whether it succeeded, and if it did not they
+        are rolled back.
+        """
+        ids = list(ids)
+        fields = list(deltas)
+        columns = [np.asarray(deltas[field], dtype=np.int64) for field in fields]
+        with self.lock:
+            previous = {telegram_id: self._accounts[telegram_id].copy() for telegram_id in ids}
+            for telegram_id, *changes in zip(ids, *(column.tolist() for column in columns)):
+                record = self._accounts[telegram_id]
+                for field, change in zip(fields, changes):
+                    setattr(record, field, getattr(record, field) + change)
+                for field, value in values.items():
+                    setattr(record, field, value)
+                # Deltas and set values alike move the running totals
+                self._track(telegram_id)
+            self._dirty.update(ids)
+            if self.flush():
+                return True
+            self.rollback(previous)
+            return False
+
+    def rollback(self, previous):
+        """Put records back to the copies in previous (telegram_id -> AccountRecord)"""
+        with self.lock:
+            for telegram_id, record in previous.items():
+                self._accounts[telegram_id].update(record)
+                self._track(telegram_id)
+
+    def ids(self):
+        with self.lock:
+            return list(self._accounts)
+
+    def all(self):
+        """Return every account as a dict of strings, in file order"""
+        with self.lock:
+            return [record.to_row() for record in self._accounts.values()]
+
+    def __len__(self):
+        return len(self._accounts)
+
+    def add(self, row):
+        """Add an account from a dict of strings or an AccountRecord"""
+        with self.lock:
+            telegram_id = self._index(row)
+            self._deleted.discard(telegram_id)
+            self.mark_dirty(telegram_id)
+
+    def replace_all(self, rows):
+        """Swap in a full list of rows, as the old load/modify/save callers do"""
+        with self.lock:
+            previous = set(self._accounts)
+            self._accounts = {}
+            self._by_referral = {}
+            self._contributions = {}
+            self._totals = dict.fromkeys(AGGREGATE_FIELDS, 0)
+            for row in rows:
+                self._index(row)
+            self._deleted.update(previous - set(self._accounts))
+            self._deleted.difference_update(self._accounts)
+            self._dirty.update(self._accounts)
+            self._schedule_flush()
+
+    @contextmanager
+    def transaction(self):
+        """Hold the store lock for the whole block and commit with a single write.
+
+        Nothing is applied if the block raises.
+        """
+        with self.lock:
+            txn = AccountTransaction(self)
+            yield txn
+            txn.commit()
+
+    def mark_dirty(self, telegram_id):
+        with self.lock:
+            self._dirty.add(str(telegram_id))
+            self._track(str(telegram_id))
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Hand dirty rows to the backend. Returns False if the write failed."""
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty and not self._deleted:
+                return True
+
+            # Only the changed rows, so a flush costs O(changes) rather than O(accounts)
+            rows = [self._accounts[telegram_id].to_row() for telegram_id in self._dirty if telegram_id in self._accounts]
+            try:
+                self.backend.write(rows, set(self._deleted))
+            except Exception as e:
+                logger.error(f"Error saving accounts: {e}")
+                self._schedule_flush()
+                return False
+
+            self._dirty.clear()
+            self._deleted.clear()
+            return True
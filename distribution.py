@@ -0,0 +1,98 @@
+import asyncio
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Realised P/L below this is left to add up with later closes
+MIN_CLOSED_PL = 1
+NON_TRADING_COMMENTS = "deposit|withdraw|balance|adjust|transfer|funding"
+
+# Above this, weight * amount could overflow int64 and we fall back to Python ints
+_INT64_SAFE = 2 ** 62
+
+
+def allocate_pro_rata(weights, total_cents):
+    """
+    Split total_cents across accounts in proportion to weights, exact to the cent.
+
+    Every share is floored first, then the cents left over go one each to the
+    largest remainders (ties to the earlier account), so the shares always sum
+    to total_cents. Accounts with a weight <= 0 get nothing.
+        Returns:
+            np.ndarray: int64 share per account, in cents
+    """
+    weights = np.maximum(np.asarray(weights, dtype=np.int64), 0)
+    denominator = int(weights.sum())
+    amount = abs(int(total_cents))
+    if denominator == 0 or amount == 0:
+        return np.zeros(len(weights), dtype=np.int64)
+
+    if int(weights.max()) * amount < _INT64_SAFE:
+        shares, remainders = np.divmod(weights * amount, denominator)
+    else:
+        exact = [divmod(weight * amount, denominator) for weight in weights.tolist()]
+        shares = np.array([share for share, _ in exact], dtype=np.int64)
+        remainders = np.array([remainder for _, remainder in exact], dtype=np.float64)
+
+    leftover = amount - int(shares.sum())
+    if leftover:
+        order = np.argsort(-remainders, kind="stable")
+        shares[order[:leftover]] += 1
+
+    return shares if total_cents > 0 else -shares
+
+
+async def distribute_new_closed_pl(ea, accounts, minimum=MIN_CLOSED_PL):
+    """
+    Share the P/L of the trades closed since the last distribution across balances.
+
+    ea is an async EA client and accounts an AccountManager. Every trade
+    fetched is appended to the trades log, distributed or not. The EA's
+    close-time cursor is only moved past a batch once its trades are marked
+    processed, so trades left over (P/L below minimum, no balances to share
+    it with, or a failed write) are fetched again with the next poll and
+    added to the trades that closed since.
+        Returns:
+            tuple: (closed P/L, number of trades) once distributed, None otherwise
+    """
+    closed_positions = await ea.get_new_closed_positions()
+    if closed_positions is None or closed_positions.empty:
+        logger.info("No closed positions found")
+        return None
+    await asyncio.to_thread(ea.log_closed_positions, closed_positions)
+
+    # Filter out deposits plus withdraws and already processed trades
+    valid_trades = closed_positions[
+        (closed_positions['symbol'].notna()) &
+        (closed_positions['position_type'].isin(['buy', 'sell'])) &  # Only buy/sell trades
+        (~accounts.is_processed(closed_positions['ticket'])) &
+        (~closed_positions['comment'].str.contains(NON_TRADING_COMMENTS, case=False, na=False))
+    ]
+    if valid_trades.empty:
+        logger.info("No new valid trades to process")
+        ea.advance_closed_cursor(closed_positions)
+        return None
+
+    total_closed_pl = round(valid_trades['profit'].sum(), 2)
+    logger.info(f"New Valid Closed P/L: {total_closed_pl} from {len(valid_trades)} trades")
+
+    # Skip if no significant movement
+    if abs(total_closed_pl) < minimum:
+        logger.info("No significant realized P/L to apply.")
+        return None
+
+    # Split the P/L across positive balances in one pass, exact to the cent
+    committed = accounts.share_closed_pl(total_closed_pl)
+    if committed is None:
+        logger.warning("No user balances to apply P/L to.")
+        return None
+
+    if not committed:
+        logger.error("Failed to save updated user balances.")
+        return None
+
+    accounts.mark_processed(valid_trades['ticket'])
+    ea.advance_closed_cursor(closed_positions)
+    return total_closed_pl, len(valid_trades)
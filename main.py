@@ -23,7 +23,14 @@ from withdraws.withdraw_tracker import WithdrawalTracker
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from functools import wraps
 import asyncio
-from mt5.EACommunicator_API import EACommunicator_API
+from mt5.EACommunicator_API import EACommunicator_API, EATimeoutError
+from mt5.trade_events import TradeEventSubscriber
+from mt5.trades_log import trades_log
+from storage.equity_curve import equity_curve
+from storage.trades_store import trades_store
+from distribution import distribute_new_closed_pl
+from period_stats import day_numbers, performance_breakdown, period_totals, trade_period_totals
+from trade_dates import parse_trade_dates
 
 def synchronized_lock(lock_name):
     def decorator(f):
@@ -99,6 +106,9 @@ $1000 → Day 28: $1741
 INTEREST_RATE = 0.15  # 15% daily
 INTEREST_INTERVAL = timedelta(days=1)
 INTEREST_FEE_RATE = 0.10  # 10% fee on earned interest
+# Closes pushed by the EA trigger distribution at once; the poll only catches missed events
+EA_EVENTS_PORT = int(os.getenv("EA_EVENTS_PORT", "5556"))
+PROFIT_POLL_SECONDS = int(os.getenv("PROFIT_POLL_SECONDS", "300"))
 
 account_manager = AccountManager("accounts.csv") 
 withdrawal_tracker = WithdrawalTracker()
@@ -340,8 +350,7 @@ async def show_account(update_or_query, context: ContextTypes.DEFAULT_TYPE):
   
     
     # Get withdrawal data
-    withdrawal_data = withdrawal_tracker._load_data()
-    user_data = next((item for item in withdrawal_data if item["user_id"] == user_id), None)
+    user_data = withdrawal_tracker.get_user_data(user_id)
 
     last_withdrawal = "Never"
     withdrawals_this_month = 0
@@ -358,8 +367,9 @@ async def show_account(update_or_query, context: ContextTypes.DEFAULT_TYPE):
     total_interest = account_info.get('total_interest', '0.00') 
 
     total_deposits = account_info.get('total_deposits', '0.00')
-    floating_pl = account_manager.get_floating_pl()
-    closed_pl = account_manager.get_closed_pl()
+    snapshot = await account_manager.get_positions_snapshot()
+    floating_pl = snapshot.floating_pl if snapshot else 0.0
+    closed_pl = snapshot.closed_pl if snapshot else 0.0
     # Format response
     response = (
         "📊 *Account Information*\n\n"
@@ -486,36 +496,155 @@ async def handle_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return ConversationHandler.END
 
 
+# Last rendered /tradingstats message and the (trades log version, date) it was built for
+_stats_cache = {}
+
 async def trading_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Generate and send trading statistics based on closed trades.
     Handles both CSV file and MT4 API as data sources.
     """
     try:
-        # Get trades data from available sources
-        trades = await get_trades_data()
-        
-        # Validate we have trades data
-        if trades is None or trades.empty:
-            await send_no_trades_message(update)
+        # Only the periods shown need loading: this week, this month and last month
+        date_ranges = calculate_date_ranges()
+        since = min(date_ranges['start_of_week'], date_ranges['last_month_start'])
+
+        # The message only changes when trades are logged or the date rolls over
+        cache_key = (trades_log().version, date_ranges['today'])
+        if _stats_cache.get('key') == cache_key:
+            await send_stats_message(update, _stats_cache['message'], reply_markup=breakdown_keyboard())
             return
-        
-        # Process and analyze the trades data
-        msg = await generate_stats_message(trades)
+
+        # Period sums over the trades store's daily rollup, when it exists
+        msg = await get_rollup_stats_message(date_ranges, since)
+
+        if msg is None:
+            # Get trades data from available sources
+            trades = await get_trades_data(since)
+
+            # Validate we have trades data
+            if trades is None or trades.empty:
+                await send_no_trades_message(update)
+                return
+
+            # Process and analyze the trades data
+            msg = await generate_stats_message(trades)
+
+        # Kept up to date by the trades log, so this is a constant-time read
+        equity = equity_curve()
+        if equity.days:
+            msg += "\n" + format_equity(equity.summary(), equity.daily_returns(last=7))
+
+        # Keyed on the version read before computing, so trades logged meanwhile force a recompute
+        _stats_cache.update(key=cache_key, message=msg)
         
         # Send the message
-        await send_stats_message(update, msg)
+        await send_stats_message(update, msg, reply_markup=breakdown_keyboard())
         
     except Exception as e:
         logger.error(f"Failed to generate trading stats: {e}", exc_info=True)
         await send_error_message(update, "Failed to generate trading statistics.")
 
-async def get_trades_data():
+# Breakdown callback keys for the periods of stats_periods()
+BREAKDOWN_PERIODS = {
+    "today": "📅 Today",
+    "week": "🗓️ This Week",
+    "month": "📆 This Month",
+    "last_month": "📉 Last Month",
+}
+
+# Last rendered breakdown per period key, with the (trades log version, date) it was built for
+_breakdown_cache = {}
+
+def breakdown_keyboard():
+    return InlineKeyboardMarkup([[
+        InlineKeyboardButton(f"🔎 {label.split(' ', 1)[1]}", callback_data=f"tradingstats_breakdown_{key}")
+        for key, label in BREAKDOWN_PERIODS.items()
+    ]])
+
+async def trading_stats_breakdown(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Per-symbol and per-direction performance for one stats period, cached like the totals.
+    """
+    try:
+        key = update.callback_query.data[len("tradingstats_breakdown_"):]
+        label = BREAKDOWN_PERIODS[key]
+        date_ranges = calculate_date_ranges()
+        start, end = stats_periods(date_ranges)[label]
+
+        cache_key = (trades_log().version, date_ranges['today'])
+        cached = _breakdown_cache.get(key)
+        if cached and cached[0] == cache_key:
+            await send_stats_message(update, cached[1])
+            return
+
+        trades = await get_period_trades(start, end)
+        if trades is None:
+            await send_no_trades_message(update)
+            return
+
+        msg = breakdown_message(label, *performance_breakdown(
+            trades['symbol'], trades['position_type'], trades['profit']
+        ))
+        _breakdown_cache[key] = (cache_key, msg)
+        await send_stats_message(update, msg)
+
+    except Exception as e:
+        logger.error(f"Failed to generate trading stats breakdown: {e}", exc_info=True)
+        await send_error_message(update, "Failed to generate the breakdown.")
+
+async def get_period_trades(start, end=None):
+    """
+    Symbol, direction, profit and close time of the trades closed from start to end (inclusive).
+    Only those columns of the touched months are read from the trades store; without one the
+    trades come from get_trades_data and are filtered here.
+    """
+    columns = ['symbol', 'position_type', 'profit', 'closetime']
+    store = trades_store()
+    if store.months():
+        return await asyncio.to_thread(store.read, start, end, columns)
+
+    trades = await get_trades_data(start)
+    if trades is None or trades.empty:
+        return None
+    days = day_numbers(parse_mixed_dates(trades['closetime']))
+    in_period = days >= day_numbers([start])[0]
+    if end is not None:
+        in_period &= days <= day_numbers([end])[0]
+    return trades.loc[in_period, columns]
+
+def breakdown_message(label, by_symbol, by_direction, max_symbols=15):
     """
-    Retrieve trades data from CSV or fall back to MT4 API.
+    Render performance_breakdown tables, profits in the same units as the totals.
+    """
+    if by_symbol.empty:
+        return f"🔎 *Breakdown: {label}*\n\n• No trades found\n"
+
+    def line(name, row):
+        return (
+            f"• `{name}`: {int(row.trades)} trades, `{row.profit/100:.2f}%`, "
+            f"win rate {row.win_rate:.1f}%, avg win `{row.avg_win/100:.2f}%`, avg loss `{row.avg_loss/100:.2f}%`\n"
+        )
+
+    msg = f"🔎 *Breakdown: {label}*\n\n*By symbol*\n"
+    msg += "".join(line(name, row) for name, row in by_symbol.head(max_symbols).iterrows())
+    if len(by_symbol) > max_symbols:
+        msg += f"• …and {len(by_symbol) - max_symbols} more\n"
+    msg += "\n*By direction*\n"
+    msg += "".join(line(name.capitalize(), row) for name, row in by_direction.iterrows())
+    return msg
+
+async def get_trades_data(since=None):
+    """
+    Retrieve trades data from the trades store, the CSV or fall back to MT4 API.
+    The store only loads the months from since on; the other sources return everything.
     Returns a DataFrame with trades or None if no data available.
     """
     csv_file = "trades_log.csv"
+
+    trades = await get_trades_from_store(csv_file, since)
+    if trades is not None:
+        return trades
     
     # Try to get data from CSV first
     trades = await get_trades_from_csv(csv_file)
@@ -525,6 +654,25 @@ async def get_trades_data():
     # Fall back to MT4 if CSV is not available or empty
     return await get_trades_from_mt4()
 
+async def get_trades_from_store(csv_file, since=None):
+    """
+    Load trades closed since the given date from the month-partitioned trades store,
+    converting the CSV into it the first time. Returns None if neither has any trades.
+    """
+    store = trades_store()
+    try:
+        if not store.initialised and os.path.exists(csv_file) and os.path.getsize(csv_file) > 0:
+            await asyncio.to_thread(store.import_csv, csv_file)
+        if not store.months():
+            return None
+
+        trades = await asyncio.to_thread(store.read, since)
+        logger.info(f"Loaded {len(trades)} trades since {since} from {store.root}")
+        return trades
+    except Exception as e:
+        logger.error(f"Error reading trades store: {e}")
+        return None
+
 async def get_trades_from_csv(csv_file):
     """
     Attempt to load trades data from CSV file.
@@ -608,12 +756,7 @@ async def get_trades_from_mt4():
     Returns DataFrame if successful, None otherwise.
     """
     try:
-        mt4 = EACommunicator_API()
-        if not mt4.Connect():
-            logger.error("Failed to connect to MT4")
-            return None
-            
-        trades = mt4.Get_all_closed_positions()
+        trades = await account_manager.ea_async.get_closed_positions()
         if trades is None:
             logger.error("MT4 returned no trades data")
             return None
@@ -624,33 +767,17 @@ async def get_trades_from_mt4():
             return None
             
         logger.info(f"Retrieved {len(trades)} trades from MT4")
-        return trades
+        # The client shares this frame with concurrent callers; stats cleaning modifies it
+        return trades.copy()
         
     except Exception as e:
         logger.error(f"Error retrieving data from MT4: {e}")
         return None
-    finally:
-        # Clean up MT4 connection
-        if 'mt4' in locals():
-            try:
-                mt4.Disconnect()
-            except:
-                pass
 
     # Handle mixed date formats in closetime and opentime
 def parse_mixed_dates(date_series):
-        # Parse as timezone-naive directly
-    for fmt in ['%Y-%m-%d', '%Y.%m.%d']:
-        try:
-            return pd.to_datetime(date_series, format=fmt, errors='raise',utc=False)
-        except:
-            continue
-        
-        # Fallback - parse and then remove timezone to prevent date shifting
-    result = pd.to_datetime(date_series, errors='coerce')
-    if result.dt.tz is not None:
-        result = result.dt.tz_convert(None)
-    return result
+    # Each distinct string is parsed once with its own layout; datetime columns pass straight through
+    return parse_trade_dates(date_series)
 
 def validate_and_clean_trades(trades):
     """
@@ -716,65 +843,35 @@ def calculate_date_ranges():
         'past_1_year': past_1_year
     }
 
-def filter_trades_by_date(trades, date_ranges):
+def stats_periods(date_ranges):
     """
-    Filter trades based on date ranges using date objects.
+    The periods shown by /tradingstats, as label -> (first date, last date or None for open-ended).
     """
-    # Debug: Print the date ranges
-    print(f"DEBUG: Date ranges - {date_ranges}")
-    
-    # Extract just the date part from closetime for comparison
-    close_dates = trades['closetime'].dt.date
-    
-    # Convert all date ranges to date objects if they contain datetime objects
-    date_ranges_date = {
-        'today': date_ranges['today'].date() if isinstance(date_ranges['today'], datetime) else date_ranges['today'],
-        'start_of_week': date_ranges['start_of_week'].date() if isinstance(date_ranges['start_of_week'], datetime) else date_ranges['start_of_week'],
-        'start_of_month': date_ranges['start_of_month'].date() if isinstance(date_ranges['start_of_month'], datetime) else date_ranges['start_of_month'],
-        'last_month_start': date_ranges['last_month_start'].date() if isinstance(date_ranges['last_month_start'], datetime) else date_ranges['last_month_start'],
-        'last_month_end': date_ranges['last_month_end'].date() if isinstance(date_ranges['last_month_end'], datetime) else date_ranges['last_month_end'],
-        'past_3_months': date_ranges['past_3_months'].date() if isinstance(date_ranges['past_3_months'], datetime) else date_ranges['past_3_months'],
-        'past_6_months': date_ranges['past_6_months'].date() if isinstance(date_ranges['past_6_months'], datetime) else date_ranges['past_6_months'],
-        'past_1_year': date_ranges['past_1_year'].date() if isinstance(date_ranges['past_1_year'], datetime) else date_ranges['past_1_year']
-    }
-    
-    # Filter trades by date ranges using date objects
-    filtered = {
-        'daily_trades': trades[close_dates == date_ranges_date['today']],
-        'weekly_trades': trades[close_dates >= date_ranges_date['start_of_week']],
-        'monthly_trades': trades[
-            (close_dates >= date_ranges_date['start_of_month']) &
-            (close_dates <= date_ranges_date['today'])
-        ],
-        'last_month_trades': trades[
-            (close_dates >= date_ranges_date['last_month_start']) &
-            (close_dates <= date_ranges_date['last_month_end'])
-        ],
-        'last_3_months_trades': trades[close_dates >= date_ranges_date['past_3_months']],
-        'last_6_months_trades': trades[close_dates >= date_ranges_date['past_6_months']],
-        'last_year_trades': trades[close_dates >= date_ranges_date['past_1_year']]
+    today = date_ranges['today']
+    return {
+        "📅 Today": (today, today),
+        "🗓️ This Week": (date_ranges['start_of_week'], None),
+        "📆 This Month": (date_ranges['start_of_month'], today),
+        "📉 Last Month": (date_ranges['last_month_start'], date_ranges['last_month_end']),
+        # "🪻 Past 3 Months": (date_ranges['past_3_months'], None),
+        # "🌼 Past 6 Months": (date_ranges['past_6_months'], None),
+        # "📈 Past 1 Year": (date_ranges['past_1_year'], None),
     }
-    
-    # Debug: Print counts for each filtered group
-    for key, df in filtered.items():
-        print(f"DEBUG: {key} - {len(df)} trades")
-        if not df.empty:
-            print(f"DEBUG: {key} dates - {df['closetime'].dt.date.min()} to {df['closetime'].dt.date.max()}")
-    
-    return filtered
 
-def calculate_stats(df, label):
+def stats_message(totals):
     """
-    Calculate statistics for a DataFrame of trades.
+    Render period totals (label -> (profit in cents, wins, losses)) as the statistics message.
     """
-    if df.empty:
-        return f"*{label}*\n• No trades found\n"
-    
-    total_profit = df['profit'].sum()
-    successful = df[df['profit'] > 0].shape[0]
-    unsuccessful = df[df['profit'] <= 0].shape[0]
+    return "📊 *Trading Statistics*\n\n" + "\n".join(
+        format_stats(label, profit_cents / 100, successful, unsuccessful)
+        for label, (profit_cents, successful, unsuccessful) in totals.items()
+    )
+
+def format_stats(label, total_profit, successful, unsuccessful):
     total_trades = successful + unsuccessful
-    win_rate = (successful / total_trades * 100) if total_trades > 0 else 0
+    if total_trades == 0:
+        return f"*{label}*\n• No trades found\n"
+    win_rate = successful / total_trades * 100
     
     return (
         f"*{label}*\n"
@@ -784,6 +881,21 @@ def calculate_stats(df, label):
         f"• 📊 Win Rate: {win_rate:.1f}%\n"
     )
 
+def format_equity(summary, daily_returns):
+    """
+    Render the equity curve summary (amounts in cents) and recent daily returns (in %).
+    """
+    returns = "\n".join(
+        f"  {day:%d %b}: `{value:+.2f}%`" for day, value in daily_returns.items() if pd.notna(value)
+    )
+    return (
+        f"*📈 Equity Curve*\n"
+        f"• Cumulative Profit: `{summary['total_return_pct']:.2f}%`\n"
+        f"• Max Drawdown: `{summary['max_drawdown_pct']:.2f}%`\n"
+        f"• Current Drawdown: `{summary['drawdown_pct']:.2f}%`\n"
+        f"• Daily Returns:\n{returns}\n"
+    )
+
 async def generate_stats_message(trades):
     """
     Generate the statistics message from trades data.
@@ -794,31 +906,34 @@ async def generate_stats_message(trades):
     if valid_trades.empty:
         return "No valid trading data available for analysis."
     
-    # Calculate date ranges
-    date_ranges = calculate_date_ranges()
-    
-    # Filter trades by date ranges
-    filtered_trades = filter_trades_by_date(valid_trades, date_ranges)
-    
-    # Generate statistics message
-    msg = (
-        "📊 *Trading Statistics*\n\n"
-        + calculate_stats(filtered_trades['daily_trades'], "📅 Today")
-        + "\n"
-        + calculate_stats(filtered_trades['weekly_trades'], "🗓️ This Week")
-        + "\n"
-        + calculate_stats(filtered_trades['monthly_trades'], "📆 This Month")
-        + "\n"
-        + calculate_stats(filtered_trades['last_month_trades'], "📉 Last Month")
-        # + "\n"
-        # + calculate_stats(filtered_trades['last_3_months_trades'], "🪻 Past 3 Months")
-        # + "\n"
-        # + calculate_stats(filtered_trades['last_6_months_trades'], "🌼 Past 6 Months")
-        # + "\n"
-        # + calculate_stats(filtered_trades['last_year_trades'], "📈 Past 1 Year")
+    # Profit, wins and losses for every period in one pass over the close days
+    periods = stats_periods(calculate_date_ranges())
+    return stats_message(trade_period_totals(valid_trades['closetime'], valid_trades['profit'], periods))
+
+async def get_rollup_stats_message(date_ranges, since):
+    """
+    The statistics message summed from the trades store's daily rollup, O(days) rather than O(trades).
+    Returns None when there is no trades store, so the caller falls back to the raw trades.
+    """
+    store = trades_store()
+    try:
+        csv_file = "trades_log.csv"
+        if not store.initialised and os.path.exists(csv_file) and os.path.getsize(csv_file) > 0:
+            # Converting the log creates the store and its rollup
+            await asyncio.to_thread(store.import_csv, csv_file)
+        if not store.months():
+            return None
+
+        rollup = await asyncio.to_thread(store.daily_rollup, since)
+    except Exception as e:
+        logger.error(f"Error reading daily rollup: {e}")
+        return None
+
+    totals = period_totals(
+        day_numbers(rollup['date']), rollup['profit_cents'], rollup['wins'], rollup['losses'],
+        stats_periods(date_ranges)
     )
-    
-    return msg
+    return stats_message(totals)
 
 async def send_no_trades_message(update):
     """Send message when no trades are found."""
@@ -829,18 +944,18 @@ async def send_error_message(update, message):
     """Send error message."""
     await send_message(update, f"⚠️ {message}")
 
-async def send_stats_message(update, msg):
+async def send_stats_message(update, msg, reply_markup=None):
     """Send statistics message."""
-    await send_message(update, msg, parse_mode='Markdown')
+    await send_message(update, msg, parse_mode='Markdown', reply_markup=reply_markup)
 
-async def send_message(update, message, parse_mode=None):
+async def send_message(update, message, parse_mode=None, reply_markup=None):
     """Send message to the appropriate chat."""
     try:
         if update.message:
-            await update.message.reply_text(message, parse_mode=parse_mode)
+            await update.message.reply_text(message, parse_mode=parse_mode, reply_markup=reply_markup)
         elif update.callback_query:
             await update.callback_query.answer()
-            await update.callback_query.message.reply_text(message, parse_mode=parse_mode)
+            await update.callback_query.message.reply_text(message, parse_mode=parse_mode, reply_markup=reply_markup)
         else:
             logger.warning("No message or callback_query found in update")
     except Exception as e:
@@ -1111,18 +1226,14 @@ async def handle_admin_verification(update: Update, context: ContextTypes.DEFAUL
                     gross_amount = amount
                     net_amount = gross_amount * 0.90
                     
-                    # Process deposit
-                    if not account_manager.process_deposit(user_id, gross_amount):  # Store net amount after fee
+                    # Credit deposit and referral bonus in one transaction
+                    approved = account_manager.approve_deposit(user_id, gross_amount)
+                    if not approved:
                         await query.edit_message_text("❌ Failed to process deposit")
                         return
                     
-                    account = account_manager.get_account_info(user_id)
-                    # if account and account.get("first_deposit") == "1":  # Just became first deposit
-                    referrer_id = account.get("referrer_id")
+                    new_balance, referrer_id = approved
                     if referrer_id:
-                            # Calculate and add referral bonus
-                          
-                            account_manager.add_referral_earning(referrer_id, gross_amount)
                              # Notify referrer
                             try:
                                 await context.bot.send_message(
@@ -1160,7 +1271,7 @@ async def handle_admin_verification(update: Update, context: ContextTypes.DEFAUL
                             f"✅ Your deposit has been approved\n\n"
                             f"Amount: {gross_amount:.2f} USDT\n"
                             f"Credited: {net_amount:.2f} USDT (after 10% fee)\n"
-                            f"New Balance: {account_manager.get_balance(user_id):.2f} USDT"
+                            f"New Balance: {new_balance:.2f} USDT"
                         )
                     )
 
@@ -1213,13 +1324,10 @@ async def handle_admin_verification(update: Update, context: ContextTypes.DEFAUL
                     #         return
 
                         # Process withdrawal
-                    if not account_manager.update_balance(user_id, -amount):
+                    if not account_manager.approve_withdrawal(user_id, amount):
                         await query.edit_message_text("❌ Failed to process withdrawal")
                         return
 
-                    if not account_manager.update_total_withdrawals(user_id, amount):
-                        logger.warning(f"Failed to update withdrawals for {user_id}")
-
                         # Log transaction
                     tx_logger.update_status(
                             tx_id=tx_id,
@@ -1337,15 +1445,7 @@ async def deposit_amount(update: Update, context: ContextTypes.DEFAULT_TYPE):
         #         account_manager.add_referral_earning(referrer_id, amount)
         
             # Mark first deposit
-        accounts = account_manager._load_accounts()
-        for acc in accounts:
-                if acc["telegram_id"] == str(user_id):
-                 acc["first_deposit"] = "1"
-                 acc["first_deposit_date"] = datetime.now().strftime("%Y-%m-%d")
-                 acc["first_deposit_amount"] = str(amount)
-                #  acc["total_deposits"] = str(float(acc.get("total_deposits", 0)) + amount)
-                 account_manager._save_accounts(accounts)
-                 break
+        account_manager.mark_first_deposit(user_id, amount)
 
         return TXN_PROOF 
 
@@ -1539,94 +1639,37 @@ async def withdraw_address(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 
+@synchronized_lock('profits')
 async def calculate_and_distribute_profits(context: ContextTypes.DEFAULT_TYPE = None):
     try:
-        # Connect to MT4 EA
-        mt4 = EACommunicator_API()
-        mt4.Connect()
-
-        # Get closed positions and filter out deposits
-        closed_positions = mt4.Get_all_closed_positions()
-        
-        if closed_positions is None or closed_positions.empty:
-            logger.info("No closed positions found")
+        # Only fetches positions closed past the cursor on the shared EA connection
+        distributed = await distribute_new_closed_pl(account_manager.ea_async, account_manager)
+        if distributed is None:
             return False
-            
-        # Get already processed trades
-        processed_trades = account_manager.get_processed_trades()
-        
-        # Filter out deposits plus withdraws and already processed trades
-        valid_trades = closed_positions[
-            (closed_positions['symbol'].notna()) &
-            (closed_positions['position_type'].isin(['buy', 'sell'])) &  # Only buy/sell trades
-            (~closed_positions['ticket'].isin(processed_trades)) &
-            (~closed_positions['comment'].str.contains("deposit|withdraw|balance|adjust|transfer|funding", case=False, na=False))
-        ]
 
+        total_closed_pl, trade_count = distributed
+        logger.info(f"Distributed {total_closed_pl:.2f} from {trade_count} new trades")
 
-        
-        if valid_trades.empty:
-            logger.info("No new valid trades to process")
-            return False
-
-        total_closed_pl = round(valid_trades['profit'].sum(), 2)
-        logger.info(f"New Valid Closed P/L: {total_closed_pl} from {len(valid_trades)} trades")
-
-        # Skip if no significant movement
-        if abs(total_closed_pl) < 1:
-            logger.info("No significant realized P/L to apply.")
-            return False
-
-        # Load all user accounts
-        accounts = account_manager._load_accounts()
-        total_user_balances = sum(float(acc["balance"]) for acc in accounts)
-
-        if total_user_balances == 0:
-            logger.warning("No user balances to apply P/L to.")
-            return False
-
-        updated = False
-        for acc in accounts:
-            user_balance = float(acc["balance"])
-            if user_balance > 0:
-                user_share = (user_balance / total_user_balances) * total_closed_pl
-                acc["balance"] = f"{user_balance + user_share:.2f}"
-                current_interest = float(acc.get("total_interest", 0))
-                acc["total_interest"] = f"{current_interest + user_share:.2f}"
-                acc["last_profit_date"] = datetime.now().strftime("%Y-%m-%d")
-                updated = True
-
-        if updated:
-            # Save account updates
-            if not account_manager._save_accounts(accounts):
-                logger.error("Failed to save updated user balances.")
-                return False
-            
-            # Mark these trades as processed
-            new_processed_trades = processed_trades.union(set(valid_trades['ticket'].tolist()))
-            account_manager.save_processed_trades(new_processed_trades)
+        if context:
+            notification_text = (
+                f"{'✅ Profit' if total_closed_pl > 0 else '⚠️ Loss'} Distribution Complete\n\n"
+                f"• New Trades Processed: {trade_count}\n"
+                f"• Closed P/L: {total_closed_pl:.2f}\n"
+                f"• Action: {'Distributed' if total_closed_pl > 0 else 'Deducted'}"
+            )
             
-            logger.info(f"Distributed {total_closed_pl:.2f} from {len(valid_trades)} new trades")
-
-            if context:
-                notification_text = (
-                    f"{'✅ Profit' if total_closed_pl > 0 else '⚠️ Loss'} Distribution Complete\n\n"
-                    f"• New Trades Processed: {len(valid_trades)}\n"
-                    f"• Closed P/L: {total_closed_pl:.2f}\n"
-                    f"• Action: {'Distributed' if total_closed_pl > 0 else 'Deducted'}"
-                )
-                
-                for admin_id in ADMIN_IDS:
-                    try:
-                        await context.bot.send_message(
-                            chat_id=admin_id,
-                            text=notification_text
-                        )
-                    except Exception as e:
-                        logger.error(f"Failed to notify admin {admin_id}: {e}")
-
-            return True
+            for admin_id in ADMIN_IDS:
+                try:
+                    await context.bot.send_message(
+                        chat_id=admin_id,
+                        text=notification_text
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to notify admin {admin_id}: {e}")
 
+        return True
+    except EATimeoutError as e:
+        logger.warning(f"Skipping profit distribution, EA unavailable: {e}")
         return False
     except Exception as e:
         logger.error(f"Error in profit distribution: {str(e)}")
@@ -2049,14 +2092,34 @@ def main():
     scheduler.add_job(
         calculate_and_distribute_profits,
         'interval',
-        seconds=30,  
-      
+        seconds=PROFIT_POLL_SECONDS,
+        timezone='UTC'
+    )
+    scheduler.add_job(
+        account_manager.refresh_positions,
+        'interval',
+        seconds=account_manager.positions.ttl,
+        timezone='UTC'
+    )
+    scheduler.add_job(
+        account_manager.verify_totals,
+        'interval',
+        minutes=10,
         timezone='UTC'
     )
 
  
+    async def on_trades_closed(tickets):
+        # Most distributions now start here; the Application carries the bot the admin notice is sent with
+        await calculate_and_distribute_profits(app)
+        await account_manager.refresh_positions()
+
+    trade_events = TradeEventSubscriber(on_trades_closed)
+    trade_events.Connect(port=EA_EVENTS_PORT)
+
     async def on_startup(app):
         scheduler.start()
+        trade_events.start()
 
     app.add_handler(CommandHandler('start', handle_referral_start))
     # app.add_handler(CommandHandler("testnotify", test_notify))
@@ -2126,6 +2189,7 @@ def main():
     app.add_handler(CallbackQueryHandler(handle_page_change, pattern=r'^(prev_page|next_page)$'))
     app.add_handler(CallbackQueryHandler(list_all_users, pattern=r'^admin_edit_balance$'))
     app.add_handler(CallbackQueryHandler(trading_stats, pattern='^tradingstats$'))
+    app.add_handler(CallbackQueryHandler(trading_stats_breakdown, pattern=r'^tradingstats_breakdown_\w+$'))
 
 
     app.add_handler(conv_handler)
@@ -2133,7 +2197,11 @@ def main():
 
 
     print("Bot is running...\nPolling for updates...")
-    app.run_polling()
+    try:
+        app.run_polling()
+    finally:
+        trade_events.Disconnect()
+        account_manager.flush()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
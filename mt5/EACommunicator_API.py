@@ -1,25 +1,155 @@
 
 from enum import Enum
+import asyncio
+import itertools
 import json
+import logging
 import zmq
+import zmq.asyncio
 import pandas as pd
 from datetime import datetime, timedelta, time
 from io import StringIO
 import os
 
+try:
+    from mt5 import wire
+    from mt5.trades_log import trades_log
+except ImportError:  # run from inside mt5/, as meta.py does
+    import wire
+    from trades_log import trades_log
+from trade_dates import parse_trade_dates
+
+logger = logging.getLogger(__name__)
+
 class TradingCommands(Enum):
     GET_OPEN_POSITIONS = 9
     GET_CLOSED_POSITIONS = 10
 
-class EACommunicator_API:
+class EATimeoutError(Exception):
+    """The EA did not answer a command within its deadline, after all retries"""
+
+
+class _EAReplies:
+    """Request deadlines and parsing of the EA's CSV replies, shared by the blocking and asyncio clients"""
+
+    # Default seconds to wait for each reply, overridable per client; full history dumps get longer
+    COMMAND_TIMEOUTS = {
+        TradingCommands.GET_OPEN_POSITIONS: 5.0,
+        TradingCommands.GET_CLOSED_POSITIONS: 20.0,
+    }
+    DEFAULT_TIMEOUT = 10.0
+    # Extra attempts on a fresh socket after a timeout
+    RETRIES = 2
+    # Ask for the compact binary replies (mt5/wire.py); None sticks to CSV.
+    # An EA without binary support ignores the flag and answers in CSV.
+    WIRE_FORMAT = "bin"
+    # Closed positions handed to log_closed_positions are appended here once, see mt5/trades_log.py
+    TRADES_LOG_FILE = "trades_log.csv"
+
+    def _set_timeouts(self, timeouts=None, default_timeout=None, retries=None):
+        """
+        Per-client deadlines. timeouts maps commands to seconds and replaces
+        COMMAND_TIMEOUTS; other commands wait default_timeout seconds.
+        retries is the number of extra attempts after a timeout.
+        """
+        self.timeouts = dict(self.COMMAND_TIMEOUTS if timeouts is None else timeouts)
+        self.default_timeout = self.DEFAULT_TIMEOUT if default_timeout is None else default_timeout
+        self.retries = self.RETRIES if retries is None else retries
+
+    def _timeout_ms(self, command: TradingCommands) -> int:
+        return int(self.timeouts.get(command, self.default_timeout) * 1000)
+
+    def _new_socket(self):
+        # A REQ socket that missed its reply can't send again, so it is dropped and rebuilt
+        socket = self.context.socket(zmq.REQ)
+        socket.setsockopt(zmq.LINGER, 0)
+        if self.endpoint:
+            socket.connect(self.endpoint)
+        return socket
+
+    def _open_arguments(self) -> str:
+        return self.WIRE_FORMAT or ""
+
+    def _closed_arguments(self, since, by) -> str:
+        cursor = "" if since is None else f"{by}^{int(since)}"
+        if not self.WIRE_FORMAT:
+            return cursor
+        # The format flag always goes last, after two (possibly empty) cursor fields
+        return f"{cursor or '^'}^{self.WIRE_FORMAT}"
+
+    @staticmethod
+    def _decode_reply(reply: bytes):
+        """Binary replies stay bytes, anything else is CSV text"""
+        return reply if wire.is_binary(reply) else reply.decode()
+
+    def _open_positions_from_reply(self, reply) -> pd.DataFrame:
+        if wire.is_binary(reply):
+            return wire.decode_open_positions(reply)
+        return self.readCsv(reply)
+
+    def advance_closed_cursor(self, df: pd.DataFrame):
+        """Move the new-positions cursor past df, once its positions have been handled"""
+        if df is not None and not df.empty:
+            latest = int(df['closetime'].max().value // 10**9)
+            self.closed_cursor = max(self.closed_cursor or 0, latest)
+
+    def _closed_positions_from_reply(self, csvReply) -> pd.DataFrame:
+        if wire.is_binary(csvReply):
+            df = wire.decode_closed_positions(csvReply)
+            logger.debug(f"Found {len(df)} truly closed positions")
+            return df
+
+        # print("RAW RESPONSE FROM EA:", csvReply)
+        df = self.readCsv(csvReply)
+
+        if df is not None and not df.empty:
+                # Normalize column names
+            df.columns = [col.strip().lower().replace(" ", "_") for col in df.columns]
+                
+                # Ensure we have a closetime column
+            if 'closetime' not in df.columns:
+                print("⚠️ No 'closetime' column - cannot identify closed positions")
+                return pd.DataFrame()  # Return empty DataFrame
+                
+                # Convert to datetime and filter out open positions (NaT)
+            df['closetime'] = parse_trade_dates(df['closetime'])
+            df = df[df['closetime'].notna()]  # Keep only rows with actual close times
+                
+            logger.debug(f"Found {len(df)} truly closed positions")
+            return df
+        
+        return pd.DataFrame()  # Return empty DataFrame if no data
+
+    def log_closed_positions(self, df: pd.DataFrame):
+        """Append new trades to the trades_log.csv file, avoiding duplicates."""
+        if df is None or df.empty:
+            return
+        try:
+            trades_log(self.TRADES_LOG_FILE).append(df)
+        except Exception as e:
+            logger.exception(f"Error writing to trades log: {e}")
+
+    def readCsv(self, inputCsvString):
+        try:
+            return pd.read_csv(StringIO(inputCsvString))        
+        except Exception as e:
+            print(f"An error occurred: {e}")
+            return None
+
+
+class EACommunicator_API(_EAReplies):
     
     contextManager = None
     connected = False
     
-    def __init__(self):
+    def __init__(self, timeouts=None, default_timeout=None, retries=None):
+        self._set_timeouts(timeouts, default_timeout, retries)
         # Socket to talk to the server
         self.context = zmq.Context()
-        self.socket = self.context.socket(zmq.REQ)
+        self.endpoint = None
+        self.socket = self._new_socket()
+        # Close time (epoch seconds) of the newest closed position seen so far
+        self.closed_cursor = None
 
     def Disconnect(self):
         """
@@ -27,13 +157,14 @@ class EACommunicator_API:
         """
         print(f"Sending DISCONNECT command")
         self.socket.send_string("break^")
-        self.socket.close()
+        self.socket.close(linger=1000)
         self.context.term()
         return True
 
     def Connect(self, server: str = 'localhost', port: int = 5555) -> bool:
 
-        self.contextManager = self.socket.connect("tcp://{}:{}".format(server, port)) 
+        self.endpoint = "tcp://{}:{}".format(server, port)
+        self.contextManager = self.socket.connect(self.endpoint) 
 
     def Get_account_balance(self) -> float:
         """
@@ -75,95 +206,36 @@ class EACommunicator_API:
         Returns:
             DataFrame with all position information including profit
         """
-        csvReply = self.send_command(TradingCommands.GET_OPEN_POSITIONS)
-        df = self.readCsv(csvReply)
+        csvReply = self.send_command(TradingCommands.GET_OPEN_POSITIONS, self._open_arguments())
+        df = self._open_positions_from_reply(csvReply)
         return df
 
     def Get_all_closed_positions(self) -> pd.DataFrame:
         """Retrieves all closed positions/orders."""
-        csvReply = self.send_command(TradingCommands.GET_CLOSED_POSITIONS)
-
-        print("response gotten")
-        # print("RAW RESPONSE FROM EA:", csvReply)
-        df = self.readCsv(csvReply)
-
-        if df is not None and not df.empty:
-                # Normalize column names
-            df.columns = [col.strip().lower().replace(" ", "_") for col in df.columns]
-                
-                # Ensure we have a closetime column
-            if 'closetime' not in df.columns:
-                print("⚠️ No 'closetime' column - cannot identify closed positions")
-                return pd.DataFrame()  # Return empty DataFrame
-                
-                # Convert to datetime and filter out open positions (NaT)
-            df['closetime'] = pd.to_datetime(df['closetime'], errors='coerce')
-            df = df[df['closetime'].notna()]  # Keep only rows with actual close times
-                
-            print(f"Found {len(df)} truly closed positions")
+        return self.Get_closed_positions_since()
 
-            self._append_to_trades_log(df)
-
-            return df
-        
-        return pd.DataFrame()  # Return empty DataFrame if no data
+    def Get_new_closed_positions(self) -> pd.DataFrame:
+        """
+        Retrieves closed positions/orders past the close-time cursor.
+        The cursor only moves when the caller passes the positions it has handled
+        to advance_closed_cursor, so positions left unhandled are fetched again.
+        It is inclusive and CSV replies carry close dates only, so a poll can
+        repeat the latest day; callers are expected to skip tickets they have
+        already handled.
+        """
+        return self.Get_closed_positions_since(self.closed_cursor)
 
-    def _append_to_trades_log(self, df: pd.DataFrame):
-        """Append new trades to the trades_log.csv file, avoiding duplicates."""
-        try:
-            csv_file = "trades_log.csv"
-            
-            # Check if file exists and is not empty
-            file_exists = os.path.exists(csv_file) and os.path.getsize(csv_file) > 0
-            
-            existing_trade_ids = set()
-            
-            if file_exists:
-                try:
-                    # Read existing data - use first column as ticket IDs
-                    existing_df = pd.read_csv(csv_file)
-                    if not existing_df.empty:
-                        # Get the first column (ticket IDs)
-                        ticket_column = existing_df.columns[0]
-                        existing_trade_ids = set(existing_df[ticket_column].astype(str))
-                        print(f"📋 Found {len(existing_trade_ids)} existing trades in log")
-                    else:
-                        print("⚠️ Existing trades file is empty")
-                        file_exists = False
-                except pd.errors.EmptyDataError:
-                    print("⚠️ Trades file is empty - creating new file")
-                    file_exists = False
-                except Exception as e:
-                    print(f"⚠️ Could not read existing trades file: {e}")
-                    file_exists = False
-            
-            # Get the first column from incoming data (should be ticket IDs)
-            if len(df.columns) > 0:
-                ticket_column_name = df.columns[0]
-                print(f"🎫 Using '{ticket_column_name}' as ticket identifier")
-                
-                # Filter out trades that already exist in the file
-                if existing_trade_ids:
-                    new_trades = df[~df[ticket_column_name].astype(str).isin(existing_trade_ids)]
-                else:
-                    new_trades = df
-                
-                if not new_trades.empty:
-                    # Append to CSV (create file if it doesn't exist)
-                    mode = 'a' if file_exists else 'w'
-                    header = not file_exists  # Write header only if creating new file
-                    
-                    new_trades.to_csv(csv_file, mode=mode, header=header, index=False)
-                    print(f"✅ Appended {len(new_trades)} new trades to {csv_file}")
-                else:
-                    print("ℹ️ No new trades to append to log file")
-            else:
-                print("❌ No columns in incoming data")
-                
-        except Exception as e:
-            print(f"❌ Error writing to trades log: {e}")
-            import traceback
-            traceback.print_exc()
+    def Get_closed_positions_since(self, since: int = None, by: str = "time") -> pd.DataFrame:
+        """
+        Retrieves closed positions/orders past a cursor.
+        Args:
+            since: close time in epoch seconds (inclusive) or ticket number (exclusive), None for full history
+            by: "time" or "ticket"
+        Returns:
+            DataFrame with the matching closed positions
+        """
+        csvReply = self.send_command(TradingCommands.GET_CLOSED_POSITIONS, self._closed_arguments(since, by))
+        return self._closed_positions_from_reply(csvReply)
 
     def Get_closed_pl_today(self, timezone_offset: int = 3) -> float:
         """
@@ -198,17 +270,170 @@ class EACommunicator_API:
         
         return round(today_trades['profit'].sum(), 2)
 
-    def readCsv(self, inputCsvString):
-        try:
-            return pd.read_csv(StringIO(inputCsvString))        
-        except Exception as e:
-            print(f"An error occurred: {e}")
-            return None
-
     def send_command(self, command: TradingCommands, arguments: str = ''):
+        """
+        Sends a command and waits for the reply, resending on a fresh socket
+        if the EA does not answer in time (lazy pirate).
+        Raises:
+            EATimeoutError: no reply after the client's extra attempts (RETRIES by default)
+        """
         msg = "{}^{}".format(command.value, arguments)
-        self.socket.send_string(str(msg))
-        reply = self.socket.recv_string()
-        return reply
-    
- 
\ No newline at end of file
+        timeout = self._timeout_ms(command)
+        for attempt in range(self.retries + 1):
+            self.socket.send_string(str(msg))
+            if self.socket.poll(timeout, zmq.POLLIN):
+                return self._decode_reply(self.socket.recv())
+
+            logger.warning(f"No reply to {command.name} within {timeout} ms (attempt {attempt + 1}), reconnecting")
+            self.socket.close()
+            self.socket = self._new_socket()
+
+        raise EATimeoutError(f"EA did not answer {command.name} after {self.retries + 1} attempts")
+
+
+class AsyncEACommunicator(_EAReplies):
+    """
+    Non-blocking client for the same EA commands, built on zmq.asyncio.
+
+    Awaiting a command yields to the event loop while the EA works, and the
+    CSV reply is parsed in a worker thread. The REQ socket only allows one
+    request in flight, so commands on one client are serialised by a lock.
+
+    Queries are single-flight: callers asking for the same command and
+    arguments while one is already in flight wait on that request and all
+    get the same parsed DataFrame, which they must not modify in place.
+    """
+
+    def __init__(self, timeouts=None, default_timeout=None, retries=None):
+        self._set_timeouts(timeouts, default_timeout, retries)
+        self.context = zmq.asyncio.Context()
+        self.endpoint = None
+        self.socket = self._new_socket()
+        self.closed_cursor = None
+        self._lock = asyncio.Lock()
+        self._inflight = {}
+
+    def Connect(self, server: str = 'localhost', port: int = 5555):
+        self.endpoint = "tcp://{}:{}".format(server, port)
+        self.socket.connect(self.endpoint)
+
+    def Disconnect(self):
+        self.socket.close()
+        self.context.term()
+
+    async def send_command(self, command: TradingCommands, arguments: str = ''):
+        """Awaitable send_command with the same deadlines and retries as the blocking client"""
+        msg = "{}^{}".format(command.value, arguments)
+        timeout = self._timeout_ms(command)
+        async with self._lock:
+            for attempt in range(self.retries + 1):
+                await self.socket.send_string(msg)
+                if await self.socket.poll(timeout, zmq.POLLIN):
+                    return self._decode_reply(await self.socket.recv())
+
+                logger.warning(f"No reply to {command.name} within {timeout} ms (attempt {attempt + 1}), reconnecting")
+                self.socket.close()
+                self.socket = self._new_socket()
+
+        raise EATimeoutError(f"EA did not answer {command.name} after {self.retries + 1} attempts")
+
+    async def _query(self, command: TradingCommands, arguments: str, parse):
+        """Send a command and parse its reply, sharing one request among concurrent identical queries"""
+        key = (command, arguments)
+        task = self._inflight.get(key)
+        if task is None:
+            async def fetch():
+                csvReply = await self.send_command(command, arguments)
+                return await asyncio.to_thread(parse, csvReply)
+
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._inflight.pop(key, None) if self._inflight.get(key) is done else None)
+
+        # A cancelled waiter must not cancel the request the others share
+        return await asyncio.shield(task)
+
+    async def get_open_positions(self) -> pd.DataFrame:
+        return await self._query(TradingCommands.GET_OPEN_POSITIONS, self._open_arguments(), self._open_positions_from_reply)
+
+    async def get_closed_positions(self, since: int = None, by: str = "time") -> pd.DataFrame:
+        """Closed positions past an optional cursor, as in EACommunicator_API.Get_closed_positions_since"""
+        return await self._query(
+            TradingCommands.GET_CLOSED_POSITIONS, self._closed_arguments(since, by), self._closed_positions_from_reply
+        )
+
+    async def get_new_closed_positions(self) -> pd.DataFrame:
+        """Closed positions past the close-time cursor, see EACommunicator_API.Get_new_closed_positions"""
+        return await self.get_closed_positions(self.closed_cursor)
+
+    async def get_floating_pl(self) -> float:
+        open_positions = await self.get_open_positions()
+        if open_positions is not None and not open_positions.empty:
+            return open_positions['profit'].sum()
+        return 0.0
+
+    async def get_closed_pl(self) -> float:
+        closed_positions = await self.get_closed_positions()
+        if closed_positions is not None and not closed_positions.empty:
+            return closed_positions['profit'].sum()
+        return 0.0
+
+
+class AsyncEAGateway(AsyncEACommunicator):
+    """
+    Multiplexed client for an EA running ZmqCommunicator in RouterMode.
+
+    Every request goes out on one DEALER socket tagged with a correlation id,
+    so any number of commands can be in flight at once; a single reader task
+    hands each reply to the caller waiting on its id. A timed out request is
+    simply resent under a new id and a late reply to the old one is dropped,
+    so the socket never needs rebuilding.
+    """
+
+    def __init__(self, timeouts=None, default_timeout=None, retries=None):
+        super().__init__(timeouts, default_timeout, retries)
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._reader = None
+
+    def _new_socket(self):
+        socket = self.context.socket(zmq.DEALER)
+        socket.setsockopt(zmq.LINGER, 0)
+        if self.endpoint:
+            socket.connect(self.endpoint)
+        return socket
+
+    def Disconnect(self):
+        if self._reader is not None:
+            self._reader.cancel()
+        super().Disconnect()
+
+    async def _read_replies(self):
+        while True:
+            frames = await self.socket.recv_multipart()
+            if len(frames) != 2:
+                logger.warning(f"Dropping malformed EA reply with {len(frames)} frames")
+                continue
+            request_id, reply = frames
+            future = self._pending.pop(request_id, None)
+            if future is not None and not future.done():
+                future.set_result(self._decode_reply(reply))
+
+    async def send_command(self, command: TradingCommands, arguments: str = ''):
+        msg = "{}^{}".format(command.value, arguments).encode()
+        timeout = self._timeout_ms(command) / 1000
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read_replies())
+
+        for attempt in range(self.retries + 1):
+            request_id = str(next(self._ids)).encode()
+            future = asyncio.get_running_loop().create_future()
+            self._pending[request_id] = future
+            await self.socket.send_multipart([request_id, msg])
+            try:
+                return await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                self._pending.pop(request_id, None)
+                logger.warning(f"No reply to {command.name} within {timeout:g} s (attempt {attempt + 1}), resending")
+
+        raise EATimeoutError(f"EA did not answer {command.name} after {self.retries + 1} attempts")
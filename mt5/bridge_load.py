@@ -0,0 +1,136 @@
+"""
+Load driver for the EA bridge: fires requests at an EA (or at mt5/simulator.py)
+and reports throughput and latency percentiles.
+
+    python -m mt5.bridge_load --simulate --closed 100000 --client router --concurrency 16
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+try:
+    from mt5.EACommunicator_API import (
+        AsyncEACommunicator, AsyncEAGateway, EACommunicator_API, EATimeoutError, TradingCommands
+    )
+    from mt5.simulator import EASimulator
+except ImportError:  # run from inside mt5/, as meta.py does
+    from EACommunicator_API import AsyncEACommunicator, AsyncEAGateway, EACommunicator_API, EATimeoutError, TradingCommands
+    from simulator import EASimulator
+
+CLIENTS = {"sync": EACommunicator_API, "async": AsyncEACommunicator, "router": AsyncEAGateway}
+
+
+def _request(client, query):
+    """Command, arguments and parser for one query"""
+    if query == "open":
+        return TradingCommands.GET_OPEN_POSITIONS, client._open_arguments(), client._open_positions_from_reply
+    since = None if query == "closed" else int(time.time()) - 3600
+    return TradingCommands.GET_CLOSED_POSITIONS, client._closed_arguments(since, "time"), client._closed_positions_from_reply
+
+
+def _configure(client_class, args):
+    # --timeout applies to every command
+    client = client_class(timeouts={}, default_timeout=args.timeout) if args.timeout else client_class()
+    client.WIRE_FORMAT = None if args.format == "csv" else "bin"
+    client.Connect(args.server, args.port)
+    return client
+
+
+def run_sync(args):
+    """One blocking client per thread, each sending its share of the requests"""
+    latencies, failures = [], []
+    per_thread = args.requests // args.concurrency
+
+    def worker():
+        client = _configure(EACommunicator_API, args)
+        command, arguments, parse = _request(client, args.query)
+        for _ in range(per_thread):
+            started = time.perf_counter()
+            try:
+                parse(client.send_command(command, arguments))
+                latencies.append(time.perf_counter() - started)
+            except EATimeoutError:
+                failures.append(time.perf_counter() - started)
+        client.socket.close()
+        client.context.term()
+
+    threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, failures
+
+
+async def run_async(args):
+    """One asyncio client shared by concurrency tasks, as the bot shares ea_async"""
+    client = _configure(CLIENTS[args.client], args)
+    command, arguments, parse = _request(client, args.query)
+    latencies, failures = [], []
+
+    async def worker():
+        for _ in range(args.requests // args.concurrency):
+            started = time.perf_counter()
+            try:
+                parse(await client.send_command(command, arguments))
+                latencies.append(time.perf_counter() - started)
+            except EATimeoutError:
+                failures.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    client.Disconnect()
+    return latencies, failures
+
+
+def report(args, latencies, failures, elapsed):
+    done = len(latencies)
+    print(f"{args.client} client, {args.concurrency} concurrent, {args.query} positions as {args.format}")
+    print(f"  {done} ok, {len(failures)} timed out in {elapsed:.2f} s: {done / elapsed:.1f} req/s")
+    if done:
+        p50, p90, p99 = np.percentile(np.array(latencies) * 1000, [50, 90, 99])
+        print(f"  latency ms: p50 {p50:.1f}  p90 {p90:.1f}  p99 {p99:.1f}  max {max(latencies) * 1000:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure EA bridge throughput and latency")
+    parser.add_argument("--server", default="localhost")
+    parser.add_argument("--port", type=int, default=5555)
+    parser.add_argument("--client", choices=sorted(CLIENTS), default="sync")
+    parser.add_argument("--query", choices=["open", "closed", "recent"], default="closed",
+                        help="open positions, full closed history, or the last hour of closes")
+    parser.add_argument("--format", choices=["bin", "csv"], default="bin")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=None, help="seconds per attempt, instead of the client's")
+    parser.add_argument("--simulate", action="store_true", help="run mt5/simulator.py in process on --port")
+    parser.add_argument("--open", type=int, default=100)
+    parser.add_argument("--closed", type=int, default=10000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--drop", type=float, default=0.0)
+    args = parser.parse_args()
+
+    simulator = None
+    if args.simulate:
+        args.server = "127.0.0.1"
+        simulator = EASimulator(args.open, args.closed, args.latency, args.jitter, args.drop).start(args.port)
+
+    try:
+        started = time.perf_counter()
+        if args.client == "sync":
+            latencies, failures = run_sync(args)
+        else:
+            latencies, failures = asyncio.run(run_async(args))
+        report(args, latencies, failures, time.perf_counter() - started)
+        if simulator:
+            print(f"  simulator served {simulator.requests} requests, dropped {simulator.dropped}")
+    finally:
+        if simulator:
+            simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
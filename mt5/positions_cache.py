@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, replace
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PositionsSnapshot:
+    """
+    Open and closed positions as of fetched_at.
+
+    The same snapshot is handed to every caller, so its DataFrames must not be
+    modified in place; copy them first. stale is set on a snapshot older than
+    the cache's ttl, handed out while a newer one is being fetched.
+    """
+
+    open_positions: pd.DataFrame
+    closed_positions: pd.DataFrame
+    fetched_at: float
+    stale: bool = False
+
+    @property
+    def floating_pl(self) -> float:
+        if self.open_positions.empty or 'profit' not in self.open_positions:
+            return 0.0
+        return float(self.open_positions['profit'].sum())
+
+    @property
+    def closed_pl(self) -> float:
+        if self.closed_positions.empty or 'profit' not in self.closed_positions:
+            return 0.0
+        return float(self.closed_positions['profit'].sum())
+
+    @property
+    def equity(self) -> float:
+        """Closed P/L plus floating P/L, as EACommunicator_API.Get_current_equity"""
+        return self.closed_pl + self.floating_pl
+
+
+class PositionsCache:
+    """
+    Positions snapshot shared by every handler, refreshed at most once per ttl.
+
+    Closed positions are kept across refreshes and only the positions closed
+    since the last refresh are fetched, using the cache's own close-time
+    cursor; of those, only tickets not seen yet are added to the history.
+    refresh() is meant to be scheduled every ttl seconds so handlers
+    normally find a fresh snapshot. get() never waits on the EA once there
+    is a snapshot: an older one is returned marked stale and a refresh is
+    started in the background. Concurrent callers share a single refresh in
+    flight.
+    """
+
+    def __init__(self, client, ttl: float = 5.0):
+        self.client = client
+        self.ttl = ttl
+        self._snapshot = None
+        self._closed_cursor = None
+        self._closed_tickets = set()
+        self._refreshing = None
+
+    def latest(self):
+        """Last snapshot, however old, or None before the first refresh"""
+        return self._snapshot
+
+    async def get(self) -> PositionsSnapshot:
+        """The current snapshot; only the very first call waits for the EA"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return await self.refresh()
+        if time.monotonic() - snapshot.fetched_at > self.ttl:
+            # An unreachable EA would hold the caller for every retry; serve what we have
+            self._start_refresh()
+            return replace(snapshot, stale=True)
+        return snapshot
+
+    async def refresh(self) -> PositionsSnapshot:
+        """Fetch a new snapshot, or wait for the one already being fetched"""
+        # A cancelled waiter must not cancel the refresh the others share
+        return await asyncio.shield(self._start_refresh())
+
+    def _start_refresh(self) -> asyncio.Future:
+        task = self._refreshing
+        if task is None:
+            task = asyncio.ensure_future(self._refresh())
+            self._refreshing = task
+            task.add_done_callback(self._refresh_done)
+        return task
+
+    def _refresh_done(self, task):
+        if self._refreshing is task:
+            self._refreshing = None
+        # Nobody may be waiting on a background refresh, so its failure is logged here
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Error refreshing positions: {task.exception()}")
+
+    def _merge_closed(self, closed_positions, new_closed):
+        """History plus the rows of new_closed whose ticket it does not hold yet"""
+        if 'ticket' in new_closed:
+            tickets = new_closed['ticket'].tolist()
+            unseen = [ticket not in self._closed_tickets for ticket in tickets]
+            new_closed = new_closed[unseen]
+            self._closed_tickets.update(ticket for ticket, new in zip(tickets, unseen) if new)
+        if new_closed.empty:
+            return closed_positions
+        if closed_positions.empty:
+            return new_closed.reset_index(drop=True)
+        return pd.concat([closed_positions, new_closed], ignore_index=True)
+
+    async def _refresh(self) -> PositionsSnapshot:
+        open_positions, new_closed = await asyncio.gather(
+            self.client.get_open_positions(),
+            self.client.get_closed_positions(self._closed_cursor)
+        )
+        if open_positions is None:
+            open_positions = pd.DataFrame()
+
+        closed_positions = self._snapshot.closed_positions if self._snapshot else pd.DataFrame()
+        if new_closed is not None and not new_closed.empty:
+            # The cursor is inclusive, so most polls only repeat tickets already held
+            closed_positions = self._merge_closed(closed_positions, new_closed)
+            latest = int(new_closed['closetime'].max().value // 10**9)
+            self._closed_cursor = max(self._closed_cursor or 0, latest)
+
+        self._snapshot = PositionsSnapshot(open_positions, closed_positions, time.monotonic())
+        return self._snapshot
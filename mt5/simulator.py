@@ -0,0 +1,286 @@
+"""
+Stand-in for ZmqCommunicatorEA, for running the bridge without an MT4 terminal.
+
+Answers the same "cmd^args" protocol from synthetic open and closed positions,
+in CSV or in the binary format of mt5/wire.py, and can add latency and drop
+replies to exercise the clients' deadlines and retries.
+
+It listens on a ROUTER socket rather than the EA's default REP socket, like
+the EA in RouterMode. A ROUTER answers REQ clients exactly as REP does, and
+also the pipelined DEALER requests of AsyncEAGateway, so one simulator
+serves every client. Requests are still answered one at a time, in order,
+as in the EA's loop.
+
+    python -m mt5.simulator --closed 1000000 --latency 0.02 --drop 0.01
+"""
+import argparse
+import random
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import zmq
+
+try:
+    from mt5 import wire
+except ImportError:  # run from inside mt5/, as meta.py does
+    import wire
+
+GET_OPEN_POSITIONS = 9
+GET_CLOSED_POSITIONS = 10
+
+SYMBOLS = [b"EURUSD", b"GBPUSD", b"USDJPY", b"XAUUSD", b"BTCUSD"]
+DAY = 86400
+
+
+def _date_labels(epochs):
+    """TimeToString(..., TIME_DATE) for many epochs, formatting each distinct day once"""
+    days, codes = np.unique(np.asarray(epochs) // DAY, return_inverse=True)
+    labels = pd.to_datetime(days * DAY, unit="s").strftime("%Y.%m.%d").to_numpy(dtype=object)
+    return labels[codes]
+
+
+def _csv(records, columns, dates):
+    data = {}
+    for name in columns:
+        if name == "position_type":
+            data[name] = wire.POSITION_TYPES[np.minimum(records["type"], len(wire.POSITION_TYPES) - 1)]
+        elif name in ("symbol", "comment"):
+            data[name] = np.char.decode(records[name])
+        elif name in dates:
+            data[name] = _date_labels(records[name])
+        elif name in wire.SCALES:
+            data[name] = records[name] / wire.SCALES[name]
+        else:
+            data[name] = records[name]
+    return pd.DataFrame(data, columns=columns).to_csv(index=False, float_format="%.5f")
+
+
+def _binary(records):
+    return wire.MAGIC + len(records).to_bytes(4, "little") + records.tobytes()
+
+
+class EASimulator:
+    """
+    Synthetic account served over the EA protocol.
+
+    Closed positions are sorted by ticket and close time, one every few
+    minutes up to now, with an occasional deposit; close_trades() adds new
+    ones so cursors and trade events can be tested.
+    """
+
+    def __init__(self, open_positions=100, closed_positions=10000, latency=0.0, jitter=0.0, drop_rate=0.0,
+                 events_port=None, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.events_port = events_port
+        self.rng = np.random.default_rng(seed)
+        self._random = random.Random(seed)
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._ready = threading.Event()
+        self.port = None
+        self._full_history = {}
+        # Closes waiting to be published from the serving thread, which owns the PUB socket
+        self._unpublished = []
+        self.requests = 0
+        self.dropped = 0
+
+        now = int(time.time())
+        self.next_ticket = 10_000_000
+        self.closed = self._new_closed(closed_positions, now - closed_positions * 300, now)
+        self.open = self._new_open(open_positions, now)
+
+    def _tickets(self, count):
+        tickets = np.arange(self.next_ticket, self.next_ticket + count, dtype=np.int64)
+        self.next_ticket += count
+        return tickets
+
+    def _new_closed(self, count, start, end):
+        records = np.zeros(count, dtype=wire.CLOSED_RECORD)
+        records["ticket"] = self._tickets(count)
+        records["closetime"] = np.linspace(start, end, count, dtype=np.int64)
+        records["opentime"] = records["closetime"] - self.rng.integers(60, 6 * 3600, count)
+        records["type"] = self.rng.integers(0, 2, count)
+        records["symbol"] = np.array(SYMBOLS)[self.rng.integers(0, len(SYMBOLS), count)]
+        records["openprice"] = self.rng.integers(90000, 130000, count)
+        records["closeprice"] = records["openprice"] + self.rng.integers(-500, 500, count)
+        records["profit"] = self.rng.normal(0, 2500, count).astype(np.int64)
+
+        # Balance operations: no symbol, type 6, as the EA reports deposits
+        deposits = self.rng.random(count) < 0.001
+        records["type"][deposits] = 6
+        records["symbol"][deposits] = b""
+        records["comment"][deposits] = b"deposit"
+        records["profit"][deposits] = np.abs(records["profit"][deposits]) * 10
+        return records
+
+    def _new_open(self, count, now):
+        records = np.zeros(count, dtype=wire.OPEN_RECORD)
+        records["ticket"] = self._tickets(count)
+        records["type"] = self.rng.integers(0, 2, count)
+        records["volume"] = self.rng.integers(1, 200, count)
+        records["openprice"] = self.rng.integers(90000, 130000, count)
+        records["opentime"] = now - self.rng.integers(60, 24 * 3600, count)
+        records["profit"] = self.rng.normal(0, 1500, count).astype(np.int64)
+        records["symbol"] = np.array(SYMBOLS)[self.rng.integers(0, len(SYMBOLS), count)]
+        return records
+
+    def close_trades(self, count=1, profit=None):
+        """Close count new trades now, each with the given profit if any; returns their tickets"""
+        now = int(time.time())
+        with self.lock:
+            records = self._new_closed(count, now, now)
+            records["type"] = np.minimum(records["type"], 1)
+            records["symbol"][records["symbol"] == b""] = SYMBOLS[0]
+            records["comment"] = b""
+            if profit is not None:
+                records["profit"] = round(profit * wire.SCALES["profit"])
+            self.closed = np.concatenate([self.closed, records])
+            self._full_history.clear()
+            if self.events_port:
+                self._unpublished.append(records)
+        return records["ticket"].tolist()
+
+    def _publish(self, socket):
+        with self.lock:
+            batches, self._unpublished = self._unpublished, []
+        for record in (record for records in batches for record in records):
+            socket.send_string("closed^{}^{}^{}^{:.2f}^{}".format(
+                record["ticket"], record["symbol"].decode(), wire.POSITION_TYPES[record["type"]],
+                record["profit"] / 100, record["closetime"]
+            ))
+
+    def _closed_since(self, field, since):
+        # Same cursor rules as GetClosedPositionsOrders
+        if field == "time":
+            return self.closed[np.searchsorted(self.closed["closetime"], since, side="left"):]
+        if field == "ticket":
+            return self.closed[np.searchsorted(self.closed["ticket"], since, side="right"):]
+        return self.closed
+
+    def reply(self, command: str) -> bytes:
+        """The EA's answer to one command"""
+        fields = command.split("^")
+        binary = len(fields) > 1 and fields[-1] == "bin"
+        try:
+            cmd_id = int(fields[0])
+        except ValueError:
+            return b"OK" if fields[0] == "break" else b"Received unrecognized command"
+
+        with self.lock:
+            if cmd_id == GET_OPEN_POSITIONS:
+                if binary:
+                    return _binary(self.open)
+                return _csv(self.open, wire.OPEN_COLUMNS, ("opentime",)).encode()
+
+            if cmd_id == GET_CLOSED_POSITIONS:
+                field = fields[1] if len(fields) > 2 else ""
+                if not field:
+                    # The full history is asked for often and only changes on close_trades
+                    if binary not in self._full_history:
+                        self._full_history[binary] = self._closed_reply(self.closed, binary)
+                    return self._full_history[binary]
+                return self._closed_reply(self._closed_since(field, int(fields[2])), binary)
+
+        return b"Received unrecognized command"
+
+    @staticmethod
+    def _closed_reply(records, binary):
+        if binary:
+            return _binary(records)
+        return _csv(records, wire.CLOSED_COLUMNS, ("opentime", "closetime")).encode()
+
+    def _delay(self):
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self._random.gauss(self.latency, self.jitter)))
+
+    def serve(self, address="tcp://*:5555"):
+        """Answer requests until stop(), one at a time like the EA's loop"""
+        context = zmq.Context()
+        socket = context.socket(zmq.ROUTER)
+        socket.setsockopt(zmq.LINGER, 0)
+        socket.bind(address)
+        # The port actually bound, for addresses with a wildcard port
+        self.port = int(socket.getsockopt_string(zmq.LAST_ENDPOINT).rsplit(":", 1)[1])
+        self._ready.set()
+        events = None
+        if self.events_port:
+            events = context.socket(zmq.PUB)
+            events.setsockopt(zmq.LINGER, 0)
+            events.bind(f"tcp://*:{self.events_port}")
+
+        try:
+            while not self._stop.is_set():
+                if events is not None:
+                    self._publish(events)
+                if not socket.poll(100, zmq.POLLIN):
+                    continue
+                # [identity][request id or REQ's empty delimiter][command]
+                frames = socket.recv_multipart()
+                if len(frames) < 3:
+                    continue
+                self.requests += 1
+                reply = self.reply(frames[-1].decode())
+                self._delay()
+                if self._random.random() < self.drop_rate:
+                    self.dropped += 1
+                    continue
+                socket.send_multipart(frames[:-1] + [reply])
+        finally:
+            if events is not None:
+                events.close()
+            socket.close()
+            context.term()
+
+    def start(self, port=5555):
+        """serve() on localhost:port in a background thread; port 0 picks a free port, see self.port"""
+        self._stop.clear()
+        self._ready.clear()
+        address = f"tcp://127.0.0.1:{port or '*'}"
+        self._thread = threading.Thread(target=self.serve, args=(address,), daemon=True)
+        self._thread.start()
+        if not self._ready.wait(5):
+            raise RuntimeError(f"Simulator could not bind {address}")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic positions over the EA protocol")
+    parser.add_argument("--port", type=int, default=5555)
+    parser.add_argument("--events-port", type=int, default=None, help="publish trade-closed events here")
+    parser.add_argument("--open", type=int, default=100, help="open positions")
+    parser.add_argument("--closed", type=int, default=10000, help="closed positions")
+    parser.add_argument("--latency", type=float, default=0.0, help="mean seconds added to every reply")
+    parser.add_argument("--jitter", type=float, default=0.0, help="standard deviation of the latency")
+    parser.add_argument("--drop", type=float, default=0.0, help="fraction of replies never sent")
+    parser.add_argument("--close-every", type=float, default=0.0, help="close a new trade every N seconds")
+    args = parser.parse_args()
+
+    simulator = EASimulator(args.open, args.closed, args.latency, args.jitter, args.drop, args.events_port)
+    print(f"Simulating {args.open} open and {args.closed} closed positions on port {args.port}")
+    simulator.start(args.port)
+    try:
+        while True:
+            if args.close_every:
+                time.sleep(args.close_every)
+                print(f"Closed {simulator.close_trades()}")
+            else:
+                time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import asyncio
+import os
+
+import pandas as pd
+import pytest
+
+from mt5.EACommunicator_API import (
+    AsyncEACommunicator, AsyncEAGateway, EACommunicator_API, EATimeoutError, TradingCommands
+)
+from mt5.simulator import EASimulator
+
+
+@pytest.fixture
+def simulator(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # where a stray trades_log.csv would be written
+    simulator = EASimulator(open_positions=5, closed_positions=500).start(0)
+    yield simulator
+    simulator.stop()
+
+
+def connected(client, simulator):
+    client.Connect("127.0.0.1", simulator.port)
+    return client
+
+
+def test_async_client_parses_like_the_blocking_one(simulator):
+    blocking = connected(EACommunicator_API(), simulator)
+    ea = connected(AsyncEACommunicator(), simulator)
+
+    async def fetch():
+        return await ea.get_open_positions(), await ea.get_closed_positions()
+
+    try:
+        for wire_format in ("bin", None):
+            blocking.WIRE_FORMAT = ea.WIRE_FORMAT = wire_format
+            open_positions, closed_positions = asyncio.run(fetch())
+            pd.testing.assert_frame_equal(open_positions, blocking.Get_all_open_positions())
+            pd.testing.assert_frame_equal(closed_positions, blocking.Get_all_closed_positions())
+            assert len(open_positions) == 5 and len(closed_positions) == 500
+        # Parsing a reply leaves the trades log to the caller
+        assert not os.path.exists(EACommunicator_API.TRADES_LOG_FILE)
+    finally:
+        blocking.socket.close(linger=0)
+        blocking.context.term()
+        ea.Disconnect()
+
+
+def test_unanswered_requests_retry_then_time_out(simulator):
+    blocking = connected(EACommunicator_API(timeouts={}, default_timeout=0.1, retries=2), simulator)
+    ea = connected(AsyncEACommunicator(timeouts={}, default_timeout=0.1, retries=1), simulator)
+    try:
+        simulator.drop_rate = 1.0
+        with pytest.raises(EATimeoutError):
+            blocking.Get_all_open_positions()
+        assert simulator.requests == 3
+        with pytest.raises(EATimeoutError):
+            asyncio.run(ea.get_open_positions())
+        assert simulator.requests == 5
+
+        # Each retry went out on a rebuilt socket, so the clients recover once the EA answers
+        simulator.drop_rate = 0.0
+        assert len(blocking.Get_all_open_positions()) == 5
+        assert len(asyncio.run(ea.get_open_positions())) == 5
+    finally:
+        blocking.socket.close(linger=0)
+        blocking.context.term()
+        ea.Disconnect()
+
+
+def test_concurrent_identical_queries_share_one_request(simulator):
+    simulator.latency = 0.1
+    ea = connected(AsyncEACommunicator(), simulator)
+
+    async def main():
+        return await asyncio.gather(*(ea.get_open_positions() for _ in range(5)))
+
+    try:
+        replies = asyncio.run(main())
+        assert simulator.requests == 1
+        assert all(reply is replies[0] for reply in replies) and len(replies[0]) == 5
+        assert not ea._inflight
+    finally:
+        ea.Disconnect()
+
+
+def test_cancelled_waiter_leaves_the_shared_query_running(simulator):
+    simulator.latency = 0.2
+    ea = connected(AsyncEACommunicator(), simulator)
+
+    async def main():
+        waiters = [asyncio.ensure_future(ea.get_open_positions()) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        waiters[0].cancel()
+        replies = await asyncio.gather(*waiters[1:])
+        return waiters[0], replies
+
+    try:
+        cancelled, replies = asyncio.run(main())
+        assert cancelled.cancelled()
+        assert simulator.requests == 1
+        assert replies[0] is replies[1] and len(replies[0]) == 5
+    finally:
+        ea.Disconnect()
+
+
+def test_gateway_matches_pipelined_replies_to_their_requests(simulator):
+    simulator.latency = 0.02
+    gateway = connected(AsyncEAGateway(), simulator)
+    since = int(simulator.closed["closetime"][-10])
+
+    async def main():
+        return await asyncio.gather(
+            gateway.get_closed_positions(),
+            gateway.get_open_positions(),
+            gateway.get_closed_positions(since),
+            gateway.send_command(TradingCommands.GET_OPEN_POSITIONS),
+        )
+
+    try:
+        closed_positions, open_positions, recent, open_csv = asyncio.run(main())
+        assert len(closed_positions) == 500 and len(open_positions) == 5 and len(recent) == 10
+        assert open_csv.startswith("ticket,symbol")
+        assert not gateway._pending
+    finally:
+        gateway.Disconnect()
+
+
+def test_gateway_drops_replies_that_arrive_after_the_deadline(simulator):
+    gateway = connected(AsyncEAGateway(timeouts={TradingCommands.GET_OPEN_POSITIONS: 0.2}, retries=0), simulator)
+
+    async def main():
+        simulator.latency = 0.4
+        with pytest.raises(EATimeoutError):
+            await gateway.get_open_positions()
+        simulator.latency = 0.0
+        # The open positions reply lands while this waits, and must not be taken for it
+        return await gateway.get_closed_positions()
+
+    try:
+        closed_positions = asyncio.run(main())
+        assert len(closed_positions) == 500 and "closetime" in closed_positions
+        assert not gateway._pending
+    finally:
+        gateway.Disconnect()
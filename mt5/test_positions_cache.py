@@ -0,0 +1,75 @@
+import asyncio
+
+import pandas as pd
+
+from mt5.positions_cache import PositionsCache
+
+
+class FakeEA:
+    """Closed positions past an inclusive close-time cursor, counting the requests"""
+
+    def __init__(self):
+        self.closed = pd.DataFrame({
+            "ticket": [1, 2], "profit": [1.0, 2.0], "closetime": pd.to_datetime(["2025-08-01", "2025-08-02"]),
+        })
+        self.requests = 0
+
+    async def get_open_positions(self):
+        await asyncio.sleep(0.05)
+        return pd.DataFrame({"ticket": [9], "profit": [0.5]})
+
+    async def get_closed_positions(self, since=None):
+        self.requests += 1
+        await asyncio.sleep(0.05)
+        if since is None:
+            return self.closed
+        return self.closed[self.closed["closetime"] >= pd.Timestamp(since, unit="s")]
+
+
+def test_concurrent_readers_share_one_refresh():
+    ea = FakeEA()
+    cache = PositionsCache(ea, ttl=60)
+
+    async def main():
+        snapshots = await asyncio.gather(*(cache.get() for _ in range(5)))
+        assert ea.requests == 1
+        assert all(snapshot is snapshots[0] for snapshot in snapshots)
+
+        # The repeated latest day adds nothing; only the new ticket is merged
+        ea.closed = pd.concat([ea.closed, pd.DataFrame({
+            "ticket": [3], "profit": [3.0], "closetime": pd.to_datetime(["2025-08-03"]),
+        })], ignore_index=True)
+        snapshot = await cache.refresh()
+        assert snapshot.closed_positions["ticket"].tolist() == [1, 2, 3]
+        assert snapshot.closed_pl == 6.0 and snapshot.equity == 6.5
+
+    asyncio.run(main())
+
+
+def test_stale_snapshot_is_served_while_refreshing():
+    ea = FakeEA()
+    cache = PositionsCache(ea, ttl=0.01)
+
+    async def main():
+        first = await cache.get()
+        await asyncio.sleep(0.02)
+
+        # Returned at once, without waiting for the EA
+        stale = await asyncio.wait_for(cache.get(), timeout=0.01)
+        assert stale.stale and stale.fetched_at == first.fetched_at
+        assert not cache._refreshing.done()
+
+        await cache._refreshing
+        assert ea.requests == 2 and not cache.latest().stale
+        assert cache.latest().fetched_at > first.fetched_at
+
+        # A failing background refresh leaves the last snapshot in place
+        async def unreachable(since=None):
+            raise TimeoutError("EA did not reply")
+        ea.get_closed_positions = unreachable
+        await asyncio.sleep(0.02)
+        assert (await cache.get()).stale
+        await asyncio.gather(cache._refreshing, return_exceptions=True)
+        assert (await cache.get()).stale
+
+    asyncio.run(main())
@@ -0,0 +1,26 @@
+from mt5.EACommunicator_API import EACommunicator_API
+from mt5.simulator import EASimulator
+
+
+def test_simulator_answers_like_the_ea():
+    simulator = EASimulator(open_positions=5, closed_positions=2000).start(0)
+    client = EACommunicator_API()
+    client.Connect("127.0.0.1", simulator.port)
+    try:
+        binary = client.Get_all_closed_positions()
+        client.WIRE_FORMAT = None
+        csv = client.Get_all_closed_positions()
+        assert len(binary) == len(csv) == 2000
+        assert binary["ticket"].tolist() == csv["ticket"].tolist()
+        assert binary["profit"].round(2).tolist() == csv["profit"].tolist()
+        assert len(client.Get_all_open_positions()) == 5
+
+        client.WIRE_FORMAT = "bin"
+        client.advance_closed_cursor(client.Get_new_closed_positions())
+        tickets = simulator.close_trades(3)
+        assert client.Get_new_closed_positions()["ticket"].tolist()[-3:] == tickets
+        assert client.Get_closed_positions_since(tickets[0], by="ticket")["ticket"].tolist() == tickets[1:]
+    finally:
+        client.socket.close(linger=0)
+        client.context.term()
+        simulator.stop()
@@ -0,0 +1,36 @@
+import asyncio
+
+import zmq
+
+from mt5.trade_events import TradeEventSubscriber, parse_closed_event
+
+
+def test_parse_closed_event():
+    assert parse_closed_event("closed^85569546^EURUSD^sell^-12.34^1704195000") == 85569546
+
+
+def test_burst_of_closes_is_handled_once():
+    batches = []
+
+    async def on_closed(tickets):
+        batches.append(tickets)
+
+    async def main():
+        publisher = zmq.Context.instance().socket(zmq.PUB)
+        port = publisher.bind_to_random_port("tcp://127.0.0.1")
+        subscriber = TradeEventSubscriber(on_closed, debounce=0.2)
+        subscriber.Connect("127.0.0.1", port)
+        subscriber.start()
+        await asyncio.sleep(0.3)  # let the subscription reach the publisher
+
+        for message in ("closed^1^EURUSD^buy^1.00^0", "closed^oops", "heartbeat", "closed^2^EURUSD^sell^-2.00^0"):
+            publisher.send_string(message)
+        await asyncio.sleep(0.6)
+        publisher.send_string("closed^3^GBPUSD^buy^3.00^0")
+        await asyncio.sleep(0.4)
+
+        subscriber.Disconnect()
+        publisher.close(linger=0)
+
+    asyncio.run(main())
+    assert batches == [[1, 2], [3]]
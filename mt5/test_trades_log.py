@@ -0,0 +1,33 @@
+import os
+
+import pandas as pd
+
+from mt5.trades_log import TradesLog
+
+
+def test_trades_log_appends_only_new_tickets(tmp_path):
+    csv_file = str(tmp_path / "trades_log.csv")
+    log = TradesLog(csv_file)
+    assert log.append(pd.DataFrame({"ticket": [1, 2, 2], "profit": [1.0, 2.0, 2.0]})) == 2
+    assert log.append(pd.DataFrame({"ticket": [2, 3], "profit": [2.0, 3.0]})) == 1
+    assert log.version == (3, 3)
+    log.append(pd.DataFrame({"ticket": [3], "profit": [3.0]}))
+    assert log.version == (3, 3)
+    assert pd.read_csv(csv_file)["ticket"].tolist() == [1, 2, 3]
+
+    # Reopened, the sidecar index is used as is
+    assert TradesLog(csv_file).version == (3, 3)
+    assert TradesLog(csv_file).append(pd.DataFrame({"ticket": [3, 4], "profit": [3.0, 4.0]})) == 1
+
+    # An edit to the log behind our back makes the index rebuild from it
+    with open(csv_file, "a") as f:
+        f.write("5,5.0\n")
+    later = os.path.getmtime(f"{csv_file}.tickets.npy") + 10
+    os.utime(csv_file, (later, later))
+    reopened = TradesLog(csv_file)
+    assert len(reopened.tickets) == 5
+    assert reopened.append(pd.DataFrame({"ticket": [5], "profit": [5.0]})) == 0
+
+    # Tickets out of order: the version is the same after the append as on reopening
+    assert reopened.append(pd.DataFrame({"ticket": [8, 7], "profit": [8.0, 7.0]})) == 2
+    assert reopened.version == TradesLog(csv_file).version == (7, 8)
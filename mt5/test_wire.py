@@ -0,0 +1,35 @@
+import numpy as np
+
+from mt5 import wire
+
+
+def make_reply(record, rows):
+    records = np.zeros(len(rows), dtype=record)
+    for i, row in enumerate(rows):
+        for name, value in row.items():
+            records[name][i] = value
+    return wire.MAGIC + len(rows).to_bytes(4, "little") + records.tobytes()
+
+
+def test_decode_closed_positions():
+    reply = make_reply(wire.CLOSED_RECORD, [
+        {"ticket": 85569546, "type": 1, "openprice": 110512, "profit": -1234,
+         "closetime": 1704195000, "symbol": b"EURUSD", "comment": b""},
+        {"ticket": 85569551, "type": 6, "profit": 100000, "closetime": 1704196000, "comment": b"deposit"},
+    ])
+    assert wire.is_binary(reply)
+
+    df = wire.decode_closed_positions(reply)
+    assert list(df.columns) == wire.CLOSED_COLUMNS
+    assert df["ticket"].dtype == np.int64
+    assert df["position_type"].tolist() == ["sell", "unknown"]
+    assert df["profit"].tolist() == [-12.34, 1000.0]
+    assert df["openprice"][0] == 1.10512
+    assert str(df["closetime"][0]) == "2024-01-02 11:30:00"
+    assert df["symbol"].isna().tolist() == [False, True]
+    assert df["comment"][1] == "deposit"
+
+
+def test_csv_reply_is_not_binary():
+    assert not wire.is_binary("ticket,symbol\n")
+    assert not wire.is_binary(b"ticket,symbol\n")
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import time
+
+import zmq
+import zmq.asyncio
+
+logger = logging.getLogger(__name__)
+
+TOPIC = "closed"
+
+
+def parse_closed_event(message: str) -> int:
+    """Ticket of a "closed^<ticket>^<symbol>^<type>^<profit>^<closetime>" event"""
+    return int(message.split("^")[1])
+
+
+class TradeEventSubscriber:
+    """
+    Listens for the trade-closed events ZmqCommunicator publishes on its PUB socket.
+
+    A burst of closes (a basket closed at once) is gathered for up to debounce
+    seconds and handed to on_closed in one call with the list of tickets.
+    PUB/SUB drops events while the bot is down or still connecting, so this
+    only makes reacting fast; a slow poll must still run as a safety net.
+    """
+
+    def __init__(self, on_closed, debounce: float = 0.5):
+        self.on_closed = on_closed
+        self.debounce = debounce
+        self.context = zmq.asyncio.Context()
+        self.socket = self.context.socket(zmq.SUB)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        self.socket.setsockopt_string(zmq.SUBSCRIBE, TOPIC)
+        self._task = None
+
+    def Connect(self, server: str = 'localhost', port: int = 5556):
+        self.socket.connect("tcp://{}:{}".format(server, port))
+
+    def Disconnect(self):
+        if self._task is not None:
+            self._task.cancel()
+        self.socket.close()
+        self.context.term()
+
+    def start(self):
+        """Run the listener on the current event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def _recv_ticket(self):
+        message = await self.socket.recv_string()
+        try:
+            return parse_closed_event(message)
+        except (ValueError, IndexError):
+            logger.error(f"Malformed trade event: {message!r}")
+            return None
+
+    async def _next_burst(self):
+        tickets = [await self._recv_ticket()]
+        deadline = time.monotonic() + self.debounce
+        while (remaining := deadline - time.monotonic()) > 0:
+            if not await self.socket.poll(remaining * 1000, zmq.POLLIN):
+                break
+            tickets.append(await self._recv_ticket())
+        return [ticket for ticket in tickets if ticket is not None]
+
+    async def run(self):
+        while True:
+            tickets = await self._next_burst()
+            if not tickets:
+                continue
+
+            logger.info(f"EA closed {len(tickets)} trade(s): {tickets}")
+            try:
+                await self.on_closed(tickets)
+            except Exception as e:
+                logger.error(f"Error handling closed trades {tickets}: {e}")
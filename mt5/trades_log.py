@@ -0,0 +1,119 @@
+import os
+import sys
+import threading
+
+import pandas as pd
+
+try:
+    from storage.ticket_index import TicketIndex
+except ImportError:  # run from inside mt5/, as meta.py does
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from storage.ticket_index import TicketIndex
+from storage.equity_curve import equity_curve
+from storage.trades_store import trades_store
+
+
+class TradesLog:
+    """
+    trades_log.csv plus a sidecar TicketIndex of the tickets already in it.
+
+    The index is loaded once, so an append only checks the incoming tickets
+    and the CSV is only ever opened for appending. The CSV is written before
+    the index, so the index is never newer than the log; if the log is
+    changed behind our back (newer than the index) the index is rebuilt
+    from it.
+
+    Appended trades also go to the month-partitioned trades store, once that
+    has been created from the log (see storage/trades_store.py), and update
+    the equity curve (see storage/equity_curve.py), which is rebuilt from the
+    log whenever the index is.
+    """
+
+    def __init__(self, csv_file="trades_log.csv", index_path=None, store=None, equity=None):
+        self.csv_file = csv_file
+        self.index_path = index_path or f"{csv_file}.tickets.npy"
+        self.store = store
+        self.equity = equity
+        self.lock = threading.Lock()
+        self.reindexed = False
+        self.tickets = self._load_index()
+        # Logged trade count and highest ticket; changes whenever trades are appended
+        self.version = (len(self.tickets), self.tickets.latest())
+        if self.equity is not None and (self.reindexed or not self.equity.initialised):
+            self._rebuild_equity()
+
+    def _index_files(self):
+        return [self.index_path, f"{self.index_path}.log"]
+
+    def _load_index(self):
+        index_mtime = max((os.path.getmtime(f) for f in self._index_files() if os.path.exists(f)), default=None)
+        if os.path.exists(self.csv_file) and (index_mtime is None or os.path.getmtime(self.csv_file) > index_mtime):
+            for f in self._index_files():
+                if os.path.exists(f):
+                    os.remove(f)
+            tickets = TicketIndex(self.index_path)
+            tickets.add(self._read_logged_tickets())
+            self.reindexed = True
+            print(f"📋 Indexed {len(tickets)} existing trades in {self.csv_file}")
+            return tickets
+        return TicketIndex(self.index_path)
+
+    def _read_logged_tickets(self):
+        try:
+            # The first column holds the ticket IDs
+            logged = pd.read_csv(self.csv_file, usecols=[0]).iloc[:, 0]
+            return pd.to_numeric(logged, errors='coerce').dropna()
+        except pd.errors.EmptyDataError:
+            return []
+
+    def _rebuild_equity(self):
+        if not os.path.exists(self.csv_file):
+            self.equity.rebuild(pd.DataFrame())
+            return
+        try:
+            logged = pd.read_csv(self.csv_file)
+        except pd.errors.EmptyDataError:
+            logged = pd.DataFrame()
+        self.equity.rebuild(logged)
+        print(f"📈 Rebuilt the equity curve over {self.equity.summary()['days']} trading days")
+
+    def append(self, df: pd.DataFrame) -> int:
+        """Append the trades whose ticket is not logged yet, returning how many were written"""
+        if len(df.columns) == 0:
+            print("❌ No columns in incoming data")
+            return 0
+
+        ticket_column_name = 'ticket' if 'ticket' in df.columns else df.columns[0]
+        tickets = pd.to_numeric(df[ticket_column_name], errors='coerce')
+        with self.lock:
+            new_trades = df[tickets.notna().to_numpy() & ~self.tickets.contains(tickets.fillna(0))]
+            new_trades = new_trades.drop_duplicates(ticket_column_name)
+            if new_trades.empty:
+                print("ℹ️ No new trades to append to log file")
+                return 0
+
+            with open(self.csv_file, 'a', newline='') as f:
+                # Header only on a new or empty file
+                new_trades.to_csv(f, header=f.tell() == 0, index=False)
+            self.tickets.add(new_trades[ticket_column_name])
+            # Results derived from the log are cached on this
+            self.version = (len(self.tickets), self.tickets.latest())
+            print(f"✅ Appended {len(new_trades)} new trades to {self.csv_file}")
+            if self.store is not None:
+                self.store.append(new_trades, create=False)
+            if self.equity is not None:
+                self.equity.update(new_trades)
+            return len(new_trades)
+
+
+_trades_logs = {}
+_trades_logs_lock = threading.Lock()
+
+
+def trades_log(csv_file="trades_log.csv") -> TradesLog:
+    """The process-wide TradesLog for csv_file, shared by every EA client"""
+    key = os.path.abspath(csv_file)
+    with _trades_logs_lock:
+        if key not in _trades_logs:
+            _trades_logs[key] = TradesLog(key, store=trades_store(), equity=equity_curve())
+        return _trades_logs[key]
@@ -0,0 +1,79 @@
+"""Decoder for the EA's compact binary replies.
+
+A binary reply is b"EAB1", a little-endian uint32 record count, then
+fixed-size little-endian records (see GetClosedPositionsBinary and
+GetOpenPositionsBinary in Utils.mqh). Numbers travel as int64: prices
+scaled by 1e5, money and lots by 1e2, times as epoch seconds. Text fields
+are zero-padded.
+"""
+import numpy as np
+import pandas as pd
+
+MAGIC = b"EAB1"
+HEADER_SIZE = 8
+
+# OP_BUY .. OP_SELLSTOP as GetPositionTypeName names them, anything else is "unknown"
+POSITION_TYPES = np.array(["buy", "sell", "buy_limit", "sell_limit", "buy_stop", "sell_stop", "unknown"], dtype=object)
+
+CLOSED_RECORD = np.dtype([
+    ("ticket", "<i8"), ("type", "<i8"), ("openprice", "<i8"), ("closeprice", "<i8"),
+    ("profit", "<i8"), ("opentime", "<i8"), ("closetime", "<i8"),
+    ("symbol", "S16"), ("comment", "S32"),
+])
+OPEN_RECORD = np.dtype([
+    ("ticket", "<i8"), ("type", "<i8"), ("volume", "<i8"), ("openprice", "<i8"),
+    ("stoploss", "<i8"), ("takeprofit", "<i8"), ("opentime", "<i8"), ("profit", "<i8"),
+    ("symbol", "S16"), ("comment", "S32"),
+])
+
+# Same columns, in the same order, as the CSV replies
+CLOSED_COLUMNS = ["ticket", "symbol", "position_type", "openprice", "closeprice", "profit", "opentime", "closetime", "comment"]
+OPEN_COLUMNS = ["ticket", "symbol", "position_type", "volume", "openprice", "stoploss", "takeprofit", "opentime", "profit", "comment"]
+
+SCALES = {
+    "openprice": 1e5, "closeprice": 1e5, "stoploss": 1e5, "takeprofit": 1e5,
+    "profit": 1e2, "volume": 1e2,
+}
+
+
+def is_binary(reply) -> bool:
+    return isinstance(reply, (bytes, bytearray)) and reply[:4] == MAGIC
+
+
+def _decode_text(column):
+    # Few distinct symbols and comments, so only decode each once
+    codes, values = pd.factorize(column)
+    # Empty text reads back as missing, as it does from the CSV
+    decoded = np.array([v.decode("utf-8", "replace") or np.nan for v in values], dtype=object)
+    return decoded[codes]
+
+
+def _decode(reply, record, columns) -> pd.DataFrame:
+    count = int.from_bytes(reply[4:HEADER_SIZE], "little")
+    if len(reply) != HEADER_SIZE + count * record.itemsize:
+        raise ValueError(f"Binary reply holds {len(reply)} bytes, expected {count} records of {record.itemsize}")
+    records = np.frombuffer(reply, dtype=record, count=count, offset=HEADER_SIZE)
+
+    data = {}
+    for name in columns:
+        if name == "position_type":
+            types = records["type"]
+            unknown = len(POSITION_TYPES) - 1
+            data[name] = POSITION_TYPES[np.where((types >= 0) & (types < unknown), types, unknown)]
+        elif name in ("symbol", "comment"):
+            data[name] = _decode_text(records[name])
+        elif name in ("opentime", "closetime"):
+            data[name] = records[name].astype("datetime64[s]").astype("datetime64[ns]")
+        elif name in SCALES:
+            data[name] = records[name] / SCALES[name]
+        else:
+            data[name] = records[name].copy()
+    return pd.DataFrame(data, columns=columns)
+
+
+def decode_closed_positions(reply) -> pd.DataFrame:
+    return _decode(reply, CLOSED_RECORD, CLOSED_COLUMNS)
+
+
+def decode_open_positions(reply) -> pd.DataFrame:
+    return _decode(reply, OPEN_RECORD, OPEN_COLUMNS)
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+_NAT = np.iinfo(np.int64).min
+
+
+def day_numbers(values):
+    """Close times (datetimes or dates) as int64 days since 1970-01-01; missing ones stay NaT's int64 value"""
+    days = pd.to_datetime(pd.Series(values)).to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+    return days.astype(np.int64)
+
+
+def _day(value):
+    return int(np.datetime64(pd.Timestamp(value).date(), "D").astype(np.int64))
+
+
+def period_totals(days, profit_cents, wins, losses, periods):
+    """
+    Profit, wins and losses summed over every period in one pass.
+
+    days, profit_cents, wins and losses are aligned int64 arrays, one entry
+    per trade or per rollup day. The entries are bucketed per day once with
+    bincount and each period, given as (start, end) dates with end None for
+    open-ended, is then a difference of two prefix sums.
+        Returns:
+            dict: period name -> (profit in cents, wins, losses)
+    """
+    days = np.asarray(days, dtype=np.int64)
+    known = days != _NAT
+    totals = dict.fromkeys(periods, (0, 0, 0))
+    if not known.any():
+        return totals
+
+    first = int(days[known].min())
+    buckets = days[known] - first
+    length = int(buckets.max()) + 1
+    # One row per measure, prefix-summed over days with a leading zero
+    per_day = np.zeros((3, length + 1), dtype=np.int64)
+    for row, values in enumerate((profit_cents, wins, losses)):
+        per_day[row, 1:] = np.bincount(buckets, weights=np.asarray(values)[known], minlength=length).round()
+    cumulative = per_day.cumsum(axis=1)
+
+    for name, (start, end) in periods.items():
+        lo = max(_day(start) - first, 0)
+        hi = length - 1 if end is None else min(_day(end) - first, length - 1)
+        if hi >= lo:
+            profit, won, lost = (cumulative[:, hi + 1] - cumulative[:, lo]).tolist()
+            totals[name] = (profit, won, lost)
+    return totals
+
+
+def trade_period_totals(closetime, profit, periods):
+    """period_totals over individual trades; a trade with profit <= 0 counts as a loss"""
+    profit = np.asarray(profit, dtype=np.float64)
+    days = day_numbers(closetime)
+    # Trades without a profit are left out like those without a close time
+    days[np.isnan(profit)] = _NAT
+    profit = np.nan_to_num(profit)
+    return period_totals(
+        days, np.round(profit * 100).astype(np.int64),
+        (profit > 0).astype(np.int64), (profit <= 0).astype(np.int64), periods
+    )
+
+
+def performance_breakdown(symbols, directions, profit):
+    """
+    Trades, profit, win rate, average win and average loss per symbol and per direction.
+
+    One groupby over (symbol, direction) does the aggregation; the per-symbol
+    and per-direction tables are sums of its rows. Only buy/sell trades with a
+    symbol and a profit are counted, as in the period totals.
+        Returns:
+            tuple: (by_symbol, by_direction) DataFrames, sorted by profit
+    """
+    trades = pd.DataFrame({
+        "symbol": pd.Series(symbols, dtype=object).to_numpy(),
+        "direction": pd.Series(directions, dtype=object).to_numpy(),
+        "profit": pd.to_numeric(pd.Series(profit), errors="coerce").to_numpy(dtype=np.float64),
+    })
+    trades = trades[
+        trades["symbol"].notna() & (trades["symbol"].astype(str).str.strip() != "")
+        & trades["direction"].isin(["buy", "sell"]) & trades["profit"].notna()
+    ]
+    won = trades["profit"] > 0
+    trades = trades.assign(
+        wins=won.astype(np.int64),
+        win_profit=trades["profit"].where(won, 0.0),
+        loss_profit=trades["profit"].where(~won, 0.0),
+    )
+    grouped = trades.groupby(["symbol", "direction"], sort=False).agg(
+        trades=("profit", "size"), profit=("profit", "sum"), wins=("wins", "sum"),
+        win_profit=("win_profit", "sum"), loss_profit=("loss_profit", "sum"),
+    )
+
+    def summarise(level):
+        table = grouped.groupby(level=level).sum()
+        losses = table["trades"] - table["wins"]
+        table["win_rate"] = table["wins"] / table["trades"] * 100
+        table["avg_win"] = (table["win_profit"] / table["wins"].where(table["wins"] > 0)).fillna(0.0)
+        table["avg_loss"] = (table["loss_profit"] / losses.where(losses > 0)).fillna(0.0)
+        return table[["trades", "profit", "win_rate", "avg_win", "avg_loss"]].sort_values("profit", ascending=False)
+
+    return summarise("symbol"), summarise("direction")
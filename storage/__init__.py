@@ -0,0 +1,47 @@
+import os
+
+# "csv" keeps the original flat files, "sqlite" stores everything in STORAGE_DB,
+# "journal" keeps accounts as a CSV snapshot plus an append-only change journal
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "csv").lower()
+STORAGE_DB = os.getenv("STORAGE_DB", "data/cryptotrader.db")
+
+_databases = {}
+
+
+def _database(db_path):
+    from storage.sqlite_backend import SqliteDatabase
+
+    if db_path not in _databases:
+        _databases[db_path] = SqliteDatabase(db_path)
+    return _databases[db_path]
+
+
+def account_backend(csv_file, fieldnames, kind=None, db_path=None):
+    if (kind or STORAGE_BACKEND) == "sqlite":
+        from storage.sqlite_backend import SqliteAccountBackend
+        return SqliteAccountBackend(_database(db_path or STORAGE_DB), fieldnames)
+
+    if (kind or STORAGE_BACKEND) == "journal":
+        from storage.journal_backend import JournalAccountBackend
+        return JournalAccountBackend(csv_file, fieldnames)
+
+    from storage.csv_backend import CsvAccountBackend
+    return CsvAccountBackend(csv_file, fieldnames)
+
+
+def transaction_backend(csv_file, fieldnames, kind=None, db_path=None):
+    if (kind or STORAGE_BACKEND) == "sqlite":
+        from storage.sqlite_backend import SqliteTransactionBackend
+        return SqliteTransactionBackend(_database(db_path or STORAGE_DB), fieldnames)
+
+    from storage.csv_backend import CsvTransactionBackend
+    return CsvTransactionBackend(csv_file, fieldnames)
+
+
+def withdrawal_backend(csv_file, fieldnames, kind=None, db_path=None):
+    if (kind or STORAGE_BACKEND) == "sqlite":
+        from storage.sqlite_backend import SqliteWithdrawalBackend
+        return SqliteWithdrawalBackend(_database(db_path or STORAGE_DB), fieldnames)
+
+    from storage.csv_backend import CsvWithdrawalBackend
+    return CsvWithdrawalBackend(csv_file, fieldnames)
@@ -0,0 +1,49 @@
+from abc import ABC, abstractmethod
+
+
+class AccountBackend(ABC):
+    """Persistence for account rows, keyed by telegram_id."""
+
+    @abstractmethod
+    def load(self):
+        """Return every account row as a dict of strings"""
+
+    @abstractmethod
+    def write(self, rows, deleted_ids=()):
+        """Persist the changed rows, given as string mappings, and drop deleted_ids"""
+
+
+class TransactionBackend(ABC):
+    """Persistence for the transaction history, looked up by tx_id and user_id."""
+
+    @abstractmethod
+    def append(self, row):
+        """Add one transaction row"""
+
+    @abstractmethod
+    def update_status(self, tx_id, status, notes=""):
+        """Update the first transaction with tx_id. Returns True if one was found."""
+
+    @abstractmethod
+    def rows(self, user_id=None):
+        """Iterate transaction rows, optionally for a single user"""
+
+    @abstractmethod
+    def user_frame(self, user_id):
+        """Return a user's transactions as a DataFrame"""
+
+
+class WithdrawalBackend(ABC):
+    """Persistence for per-user withdrawal tracking, keyed by user_id."""
+
+    @abstractmethod
+    def load(self):
+        """Return every withdrawal row as a dict of strings"""
+
+    @abstractmethod
+    def get(self, user_id):
+        """Return the row for user_id, or None"""
+
+    @abstractmethod
+    def save(self, row):
+        """Insert or replace the row for row["user_id"]"""
@@ -0,0 +1,94 @@
+"""Run the same account/transaction/withdrawal workload against each backend.
+
+    python -m storage.bench --users 2000 --ops 500
+
+Every mutation is flushed straight away, so the numbers show the write
+cost per operation rather than the write-behind batching.
+"""
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+
+import storage
+from account_store import ACCOUNT_FIELDNAMES, AccountStore
+from trade_reconciler import TRANSACTION_FIELDNAMES, TransactionLogger
+from withdraws.withdraw_tracker import WITHDRAWAL_FIELDNAMES, WithdrawalTracker
+
+
+def _timed(fn, count):
+    start = time.perf_counter()
+    for i in range(count):
+        fn(i)
+    return (time.perf_counter() - start) / count * 1000
+
+
+def run(kind, workdir, users, ops, seed=7):
+    rng = random.Random(seed)
+    db_path = os.path.join(workdir, f"{kind}.db")
+    accounts = AccountStore(storage.account_backend(
+        os.path.join(workdir, "accounts.csv"), ACCOUNT_FIELDNAMES, kind=kind, db_path=db_path
+    ))
+    tx_logger = TransactionLogger(backend=storage.transaction_backend(
+        os.path.join(workdir, "trade_history.csv"), TRANSACTION_FIELDNAMES, kind=kind, db_path=db_path
+    ))
+    tracker = WithdrawalTracker(backend=storage.withdrawal_backend(
+        os.path.join(workdir, "withdrawals.csv"), WITHDRAWAL_FIELDNAMES, kind=kind, db_path=db_path
+    ))
+
+    for i in range(users):
+        row = {f: "" for f in ACCOUNT_FIELDNAMES}
+        row.update(telegram_id=str(1000 + i), balance="100.00", referral_id=f"REF{i:06d}")
+        accounts.add(row)
+    accounts.flush()
+
+    user_ids = [str(1000 + rng.randrange(users)) for _ in range(ops)]
+    tx_ids = []
+
+    def update_balance(i):
+        with accounts.lock:
+            acc = accounts.get(user_ids[i])
+            acc.balance += 100
+            accounts.mark_dirty(user_ids[i])
+        accounts.flush()
+
+    def log_trade(i):
+        tx_ids.append(tx_logger.log_trade(user_ids[i], "DEPOSIT", 10.0))
+
+    def update_status(i):
+        tx_logger.update_status(tx_ids[i], "COMPLETED")
+
+    def record_withdrawal(i):
+        tracker.record_withdrawal(user_ids[i])
+
+    return {
+        "update_balance": _timed(update_balance, ops),
+        "log_trade": _timed(log_trade, ops),
+        "update_status": _timed(update_status, ops),
+        "record_withdrawal": _timed(record_withdrawal, ops),
+        "lookup": _timed(lambda i: accounts.get(user_ids[i]), ops),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the csv and sqlite storage backends")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--ops", type=int, default=500)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    results = {}
+    for kind in ("csv", "journal", "sqlite"):
+        with tempfile.TemporaryDirectory() as workdir:
+            results[kind] = run(kind, workdir, args.users, args.ops)
+
+    print(f"{args.users} users, {args.ops} ops per step (ms/op)")
+    print(f"{'operation':<20}" + "".join(f"{kind:>12}" for kind in results))
+    for op in results["csv"]:
+        print(f"{op:<20}" + "".join(f"{results[kind][op]:>12.3f}" for kind in results))
+
+
+if __name__ == "__main__":
+    main()
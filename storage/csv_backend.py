@@ -0,0 +1,138 @@
+import csv
+import logging
+import os
+
+import pandas as pd
+from filelock import FileLock
+
+from storage.base import AccountBackend, TransactionBackend, WithdrawalBackend
+
+logger = logging.getLogger(__name__)
+
+
+def _write_rows(path, fieldnames, rows):
+    """Rewrite a whole CSV file through a temp file and rename"""
+    tmp_file = f"{path}.tmp"
+    with open(tmp_file, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp_file, path)
+
+
+class CsvAccountBackend(AccountBackend):
+    def __init__(self, csv_file, fieldnames):
+        self.csv_file = csv_file
+        self.fieldnames = fieldnames
+        self.lock = FileLock(f"{csv_file}.lock")
+        # Rows as last written, by telegram_id
+        self._persisted = {}
+
+    def load(self):
+        with self.lock:
+            if not os.path.exists(self.csv_file):
+                with open(self.csv_file, "w", newline="") as f:
+                    csv.DictWriter(f, fieldnames=self.fieldnames).writeheader()
+                rows = []
+            else:
+                with open(self.csv_file, "r", newline="") as f:
+                    rows = list(csv.DictReader(f))
+        self._persisted = {str(row["telegram_id"]): dict(row) for row in rows}
+        return rows
+
+    def write(self, rows, deleted_ids=()):
+        # CSV has no row-level update: the changed rows are merged into the
+        # persisted copy and the file is rewritten from it
+        persisted = dict(self._persisted)
+        for row in rows:
+            persisted[str(row["telegram_id"])] = {f: row.get(f, "") for f in self.fieldnames}
+        for telegram_id in deleted_ids:
+            persisted.pop(telegram_id, None)
+        with self.lock:
+            _write_rows(self.csv_file, self.fieldnames, persisted.values())
+        self._persisted = persisted
+
+
+class CsvTransactionBackend(TransactionBackend):
+    def __init__(self, csv_file, fieldnames):
+        self.csv_file = csv_file
+        self.fieldnames = fieldnames
+        self.ensure_csv_has_header()
+
+    def ensure_csv_has_header(self):
+        """Ensure the CSV file has correct headers. If missing, insert them."""
+        if not os.path.exists(self.csv_file):
+            return  # No file yet, nothing to fix
+
+        with open(self.csv_file, "r+", newline="") as f:
+            first_line = f.readline()
+            # Check if the first line is a valid header (starts with 'timestamp')
+            if not first_line.startswith("timestamp"):
+                # Read the rest of the file
+                rest = f.read()
+                f.seek(0)
+                f.write(",".join(self.fieldnames) + "\n" + first_line + rest)
+                logger.warning("⚠️ Header was missing in CSV. Header has been inserted.")
+
+    def append(self, row):
+        file_exists = os.path.isfile(self.csv_file)
+
+        with open(self.csv_file, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=self.fieldnames)
+            if not file_exists:
+                writer.writeheader()
+            writer.writerow(row)
+
+    def update_status(self, tx_id, status, notes=""):
+        with open(self.csv_file, "r") as f:
+            transactions = list(csv.DictReader(f))
+
+        for tx in transactions:
+            if tx.get("tx_id") == tx_id:
+                tx["status"] = status
+                tx["notes"] = notes
+                _write_rows(self.csv_file, self.fieldnames, transactions)
+                return True
+
+        return False
+
+    def rows(self, user_id=None):
+        with open(self.csv_file, "r") as f:
+            for row in csv.DictReader(f):
+                if user_id is None or row["user_id"] == str(user_id):
+                    yield row
+
+    def user_frame(self, user_id):
+        df = pd.read_csv(self.csv_file)
+
+        if 'user_id' not in df.columns:
+            raise KeyError("'user_id' column not found in CSV")
+
+        df['user_id'] = df['user_id'].astype(str)
+        return df[df['user_id'] == str(user_id)].copy()
+
+
+class CsvWithdrawalBackend(WithdrawalBackend):
+    def __init__(self, tracker_file, fieldnames):
+        self.tracker_file = tracker_file
+        self.fieldnames = fieldnames
+
+    def load(self):
+        try:
+            with open(self.tracker_file, "r") as f:
+                return list(csv.DictReader(f))
+        except FileNotFoundError:
+            return []
+
+    def get(self, user_id):
+        return next((item for item in self.load() if item["user_id"] == str(user_id)), None)
+
+    def save(self, row):
+        data = self.load()
+        for i, item in enumerate(data):
+            if item["user_id"] == row["user_id"]:
+                data[i] = row
+                break
+        else:
+            data.append(row)
+        _write_rows(self.tracker_file, self.fieldnames, data)
@@ -0,0 +1,174 @@
+import bisect
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from storage.trades_store import daily_totals, normalize_trades
+
+logger = logging.getLogger(__name__)
+
+EQUITY_FILE = os.getenv("EQUITY_FILE", "data/equity_curve.json")
+# Notional starting equity, in cents, that returns and drawdown percentages are measured against.
+# /tradingstats shows profit / 100 as a percentage, i.e. against 10,000.
+EQUITY_BASE_CENTS = int(float(os.getenv("EQUITY_BASE", "10000")) * 100)
+
+
+class EquityCurve:
+    """
+    Daily equity curve of closed trading P/L, with running peak and drawdown.
+
+    The curve keeps one P/L entry per close day (the trades /tradingstats
+    counts, so no deposits or withdrawals). Every day before the latest is
+    folded into running totals (cumulative P/L, peak equity, max drawdown),
+    so update() with trades on the latest day or later costs O(new days) and
+    summary() is O(1). A batch closing on an earlier day re-folds the daily
+    series, O(days). Only the daily series is persisted; the running totals
+    are rebuilt from it on load.
+    """
+
+    def __init__(self, path=EQUITY_FILE, base_cents=EQUITY_BASE_CENTS):
+        self.path = path
+        self.base_cents = base_cents
+        self.lock = threading.Lock()
+        self.days = []
+        self.pnl = []
+        self._load()
+
+    @property
+    def initialised(self):
+        return os.path.exists(self.path)
+
+    def _load(self):
+        if not self.initialised:
+            self._fold()
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            self.days, self.pnl = data["days"], data["pnl"]
+        except (ValueError, KeyError) as e:
+            logger.error(f"Could not read equity curve {self.path}: {e}")
+        self._fold()
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_file = f"{self.path}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump({"base_cents": self.base_cents, "days": self.days, "pnl": self.pnl}, f)
+        os.replace(tmp_file, self.path)
+
+    def _fold(self):
+        """Rebuild the running totals over every day but the latest"""
+        self.closed_cum = 0
+        self.closed_peak = self.base_cents
+        self.closed_max_dd = 0
+        self.closed_max_dd_pct = 0.0
+        for cents in self.pnl[:-1]:
+            self._close_day(cents)
+
+    def _close_day(self, cents):
+        self.closed_cum += cents
+        equity = self.base_cents + self.closed_cum
+        self.closed_peak = max(self.closed_peak, equity)
+        drawdown = self.closed_peak - equity
+        self.closed_max_dd = max(self.closed_max_dd, drawdown)
+        if self.closed_peak > 0:
+            self.closed_max_dd_pct = max(self.closed_max_dd_pct, drawdown / self.closed_peak * 100)
+
+    def _add_day(self, day, cents):
+        if not self.days or day > self.days[-1]:
+            if self.pnl:
+                self._close_day(self.pnl[-1])
+            self.days.append(day)
+            self.pnl.append(cents)
+            return False
+        if day == self.days[-1]:
+            self.pnl[-1] += cents
+            return False
+
+        # Closed on an earlier day: the folded totals no longer hold
+        position = bisect.bisect_left(self.days, day)
+        if self.days[position] == day:
+            self.pnl[position] += cents
+        else:
+            self.days.insert(position, day)
+            self.pnl.insert(position, cents)
+        return True
+
+    def update(self, trades: pd.DataFrame) -> int:
+        """Add a batch of newly closed trades, returning how many close days it touched"""
+        totals = daily_totals(normalize_trades(trades))
+        if totals.empty:
+            return 0
+
+        days = totals["date"].to_numpy(dtype="datetime64[D]").astype(np.int64).tolist()
+        with self.lock:
+            refold = False
+            for day, cents in zip(days, totals["profit_cents"].tolist()):
+                refold |= self._add_day(day, cents)
+            if refold:
+                self._fold()
+            self._save()
+        return len(days)
+
+    def rebuild(self, trades: pd.DataFrame):
+        """Recompute the curve from every closed trade"""
+        with self.lock:
+            self.days, self.pnl = [], []
+            self._fold()
+        self.update(trades)
+        if not self.initialised:
+            with self.lock:
+                self._save()
+
+    def summary(self) -> dict:
+        """Cumulative P/L, peak, current and max drawdown in cents, and returns in percent, in O(1)"""
+        with self.lock:
+            cumulative = self.closed_cum + (self.pnl[-1] if self.pnl else 0)
+            equity = self.base_cents + cumulative
+            peak = max(self.closed_peak, equity)
+            drawdown = peak - equity
+            drawdown_pct = drawdown / peak * 100 if peak > 0 else 0.0
+            return {
+                "cumulative_pl": cumulative,
+                "equity": equity,
+                "peak": peak,
+                "drawdown": drawdown,
+                "drawdown_pct": drawdown_pct,
+                "max_drawdown": max(self.closed_max_dd, drawdown),
+                "max_drawdown_pct": max(self.closed_max_dd_pct, drawdown_pct),
+                "total_return_pct": cumulative / self.base_cents * 100 if self.base_cents else 0.0,
+                "days": len(self.days),
+            }
+
+    def daily_returns(self, last=None) -> pd.Series:
+        """Return of each close day in percent of the equity at its start, the latest `last` days only"""
+        with self.lock:
+            count = len(self.pnl) if last is None else min(last, len(self.pnl))
+            pnl = np.array(self.pnl[len(self.pnl) - count:], dtype=np.int64)
+            days = np.array(self.days[len(self.days) - count:], dtype="datetime64[D]")
+            end_equity = self.base_cents + self.closed_cum + (self.pnl[-1] if self.pnl else 0)
+        # Walk back from the current equity, so only the requested days are touched
+        start_equity = end_equity - np.cumsum(pnl[::-1])[::-1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = np.where(start_equity > 0, pnl / start_equity * 100, np.nan)
+        return pd.Series(returns, index=pd.DatetimeIndex(days, name="date"), name="return_pct")
+
+
+_curves = {}
+_curves_lock = threading.Lock()
+
+
+def equity_curve(path=EQUITY_FILE) -> EquityCurve:
+    """The process-wide EquityCurve persisted at path"""
+    key = os.path.abspath(path)
+    with _curves_lock:
+        if key not in _curves:
+            _curves[key] = EquityCurve(key)
+        return _curves[key]
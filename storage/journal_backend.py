@@ -0,0 +1,137 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from storage.csv_backend import CsvAccountBackend, _write_rows
+
+logger = logging.getLogger(__name__)
+
+
+class JournalAccountBackend(CsvAccountBackend):
+    """Accounts kept as a CSV snapshot plus an append-only change journal.
+
+    Each flush appends one compact record per changed row, holding only the
+    fields that changed and their new values, and fsyncs the journal once
+    for the whole batch. Records carry values rather than deltas so that
+    replaying them is idempotent. Once the journal grows past
+    compact_records, or compact_interval seconds pass, a background thread
+    folds it into a fresh snapshot.
+    """
+
+    def __init__(self, csv_file, fieldnames, compact_records=5000, compact_interval=3600):
+        super().__init__(csv_file, fieldnames)
+        self.journal_file = f"{csv_file}.journal"
+        self.compact_records = compact_records
+        self.compact_interval = compact_interval
+        self._journal_lock = threading.Lock()
+        self._journal = None
+        self._records = 0
+        self._last_compaction = time.monotonic()
+        self._compacting = None
+
+    def load(self):
+        super().load()
+
+        rotated = f"{self.journal_file}.old"
+        interrupted = os.path.exists(rotated)
+        for path in (rotated, self.journal_file):
+            self._records += self._replay(path)
+
+        self._journal = open(self.journal_file, "ab")
+        if interrupted or self._records:
+            # Fold what we replayed so startup cost stays bounded
+            self.compact()
+        return [dict(row) for row in self._persisted.values()]
+
+    def _replay(self, path):
+        if not os.path.exists(path):
+            return 0
+
+        count = 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-append
+                    logger.warning(f"Skipping unreadable journal record in {path}")
+                    continue
+                self._apply(record)
+                count += 1
+        return count
+
+    def _apply(self, record):
+        telegram_id = record.pop("id")
+        if record.pop("deleted", False):
+            self._persisted.pop(telegram_id, None)
+            return
+        row = self._persisted.setdefault(telegram_id, {"telegram_id": telegram_id})
+        row.update(record)
+
+    def write(self, rows, deleted_ids=()):
+        lines = []
+        written = {}
+
+        with self._journal_lock:
+            for row in rows:
+                telegram_id = str(row["telegram_id"])
+                previous = self._persisted.get(telegram_id, {})
+                changes = {f: row.get(f, "") for f in self.fieldnames if row.get(f, "") != previous.get(f)}
+                if not changes:
+                    continue
+                written[telegram_id] = {f: row.get(f, "") for f in self.fieldnames}
+                lines.append(json.dumps({"id": telegram_id, **changes}, separators=(",", ":")))
+
+            deleted = [telegram_id for telegram_id in deleted_ids if telegram_id in self._persisted]
+            for telegram_id in deleted:
+                lines.append(json.dumps({"id": telegram_id, "deleted": True}, separators=(",", ":")))
+
+            if not lines:
+                return
+
+            self._journal.write(("\n".join(lines) + "\n").encode())
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            # Only once the records are durable, so a failed write is diffed again on retry
+            self._persisted.update(written)
+            for telegram_id in deleted:
+                self._persisted.pop(telegram_id)
+            self._records += len(lines)
+
+            due = (self._records >= self.compact_records
+                   or time.monotonic() - self._last_compaction >= self.compact_interval)
+            if due and self._compacting is None:
+                self._compacting = threading.Thread(target=self.compact, daemon=True)
+                self._compacting.start()
+
+    def compact(self):
+        """Fold the journal into a fresh snapshot and start an empty journal"""
+        rotated = f"{self.journal_file}.old"
+        with self._journal_lock:
+            rows = [dict(row) for row in self._persisted.values()]
+            self._journal.close()
+            if not os.path.exists(rotated):
+                os.replace(self.journal_file, rotated)
+            else:
+                # A previous compaction failed after rotating; keep both until a snapshot lands
+                with open(self.journal_file, "rb") as src, open(rotated, "ab") as dst:
+                    dst.write(src.read())
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                os.remove(self.journal_file)
+            self._journal = open(self.journal_file, "ab")
+            self._records = 0
+            self._last_compaction = time.monotonic()
+
+        try:
+            with self.lock:
+                _write_rows(self.csv_file, self.fieldnames, rows)
+            os.remove(rotated)
+            logger.info(f"Compacted account journal into {self.csv_file} ({len(rows)} accounts)")
+        except Exception as e:
+            # The rotated journal stays on disk and is replayed on next start
+            logger.error(f"Error compacting account journal: {e}")
+        finally:
+            self._compacting = None
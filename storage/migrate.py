@@ -0,0 +1,88 @@
+"""One-shot migration of the CSV files into the SQLite backend.
+
+    python -m storage.migrate --db data/cryptotrader.db
+
+Existing rows in the target tables are replaced; each table is cleared and
+refilled in one transaction, so a failed migration leaves it as it was.
+"""
+import argparse
+import csv
+import logging
+import os
+
+from storage.csv_backend import CsvTransactionBackend, CsvWithdrawalBackend
+from storage.sqlite_backend import (
+    SqliteAccountBackend, SqliteDatabase, SqliteTransactionBackend, SqliteWithdrawalBackend
+)
+from trade_reconciler import TRANSACTION_FIELDNAMES
+from withdraws.withdraw_tracker import WITHDRAWAL_FIELDNAMES
+
+logger = logging.getLogger(__name__)
+
+
+def _clear(db, table):
+    db.conn.execute(f"DELETE FROM {table}")
+
+
+def migrate_accounts(db, csv_file):
+    if not os.path.exists(csv_file):
+        logger.warning(f"{csv_file} not found, skipping accounts")
+        return 0
+
+    with open(csv_file, "r", newline="") as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames or []
+        rows = list(reader)
+
+    backend = SqliteAccountBackend(db, fieldnames)
+    with db.transaction():
+        _clear(db, "accounts")
+        backend.write(rows)
+    return len(rows)
+
+
+def migrate_transactions(db, csv_file):
+    if not os.path.exists(csv_file):
+        logger.warning(f"{csv_file} not found, skipping transactions")
+        return 0
+
+    rows = list(CsvTransactionBackend(csv_file, TRANSACTION_FIELDNAMES).rows())
+
+    backend = SqliteTransactionBackend(db, TRANSACTION_FIELDNAMES)
+    with db.transaction():
+        _clear(db, "transactions")
+        backend.append_many(rows)
+    return len(rows)
+
+
+def migrate_withdrawals(db, csv_file):
+    rows = [row for row in CsvWithdrawalBackend(csv_file, WITHDRAWAL_FIELDNAMES).load() if row.get("user_id")]
+
+    backend = SqliteWithdrawalBackend(db, WITHDRAWAL_FIELDNAMES)
+    with db.transaction():
+        _clear(db, "withdrawals")
+        for row in rows:
+            backend.save(row)
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy the CSV data files into SQLite")
+    parser.add_argument("--db", default="data/cryptotrader.db")
+    parser.add_argument("--accounts", default="accounts.csv")
+    parser.add_argument("--transactions", default="trade_history.csv")
+    parser.add_argument("--withdrawals", default="data/withdrawals.csv")
+    args = parser.parse_args()
+
+    db = SqliteDatabase(args.db)
+    accounts = migrate_accounts(db, args.accounts)
+    transactions = migrate_transactions(db, args.transactions)
+    withdrawals = migrate_withdrawals(db, args.withdrawals)
+    db.close()
+
+    print(f"✅ Migrated {accounts} accounts, {transactions} transactions and "
+          f"{withdrawals} withdrawal records into {args.db}")
+
+
+if __name__ == "__main__":
+    main()
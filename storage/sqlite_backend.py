@@ -0,0 +1,166 @@
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+from storage.base import AccountBackend, TransactionBackend, WithdrawalBackend
+
+logger = logging.getLogger(__name__)
+
+
+class SqliteDatabase:
+    """A single WAL-mode SQLite connection shared by the sqlite backends."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.RLock()
+        # Writes come from handlers and from the account store's flush thread
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._depth = 0
+
+    @contextmanager
+    def transaction(self):
+        """BEGIN/COMMIT under the lock, rolled back on error; nested blocks join the outermost one"""
+        with self.lock:
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield self.conn
+                finally:
+                    self._depth -= 1
+                return
+
+            self._depth = 1
+            self.conn.execute("BEGIN")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            else:
+                self.conn.execute("COMMIT")
+            finally:
+                self._depth = 0
+
+    def ensure_table(self, table, key, columns, indexes=()):
+        """Create table with TEXT columns, adding any columns an older schema lacks"""
+        with self.lock:
+            if key:
+                column_defs = [f'"{key}" TEXT PRIMARY KEY'] + [f'"{c}" TEXT' for c in columns if c != key]
+            else:
+                column_defs = [f'"{c}" TEXT' for c in columns]
+            self.conn.execute(f'CREATE TABLE IF NOT EXISTS {table} ({", ".join(column_defs)})')
+
+            existing = {row["name"] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+            for column in columns:
+                if column not in existing:
+                    self.conn.execute(f'ALTER TABLE {table} ADD COLUMN "{column}" TEXT')
+
+            for column in indexes:
+                self.conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ("{column}")')
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def _upsert_sql(table, key, columns):
+    names = ", ".join(f'"{c}"' for c in columns)
+    params = ", ".join("?" for _ in columns)
+    updates = ", ".join(f'"{c}"=excluded."{c}"' for c in columns if c != key)
+    return f'INSERT INTO {table} ({names}) VALUES ({params}) ON CONFLICT("{key}") DO UPDATE SET {updates}'
+
+
+class SqliteAccountBackend(AccountBackend):
+    def __init__(self, db, fieldnames):
+        self.db = db
+        self.fieldnames = fieldnames
+        self.db.ensure_table("accounts", "telegram_id", fieldnames, indexes=["referral_id"])
+        self._upsert = _upsert_sql("accounts", "telegram_id", fieldnames)
+
+    def load(self):
+        with self.db.lock:
+            return [dict(row) for row in self.db.conn.execute("SELECT * FROM accounts ORDER BY rowid")]
+
+    def write(self, rows, deleted_ids=()):
+        params = [tuple(row.get(f, "") for f in self.fieldnames) for row in rows]
+        with self.db.transaction() as conn:
+            conn.executemany(self._upsert, params)
+            conn.executemany(
+                "DELETE FROM accounts WHERE telegram_id = ?",
+                [(telegram_id,) for telegram_id in deleted_ids]
+            )
+
+
+class SqliteTransactionBackend(TransactionBackend):
+    def __init__(self, db, fieldnames):
+        self.db = db
+        self.fieldnames = fieldnames
+        self.db.ensure_table("transactions", None, fieldnames, indexes=["tx_id", "user_id"])
+        names = ", ".join(f'"{c}"' for c in fieldnames)
+        params = ", ".join("?" for _ in fieldnames)
+        self._insert = f"INSERT INTO transactions ({names}) VALUES ({params})"
+
+    def append(self, row):
+        self.append_many([row])
+
+    def append_many(self, rows):
+        params = [tuple(row.get(f) for f in self.fieldnames) for row in rows]
+        with self.db.transaction() as conn:
+            conn.executemany(self._insert, params)
+
+    def update_status(self, tx_id, status, notes=""):
+        with self.db.lock:
+            cursor = self.db.conn.execute(
+                "UPDATE transactions SET status = ?, notes = ? "
+                "WHERE rowid = (SELECT rowid FROM transactions WHERE tx_id = ? ORDER BY rowid LIMIT 1)",
+                (status, notes, tx_id)
+            )
+            return cursor.rowcount > 0
+
+    def rows(self, user_id=None):
+        with self.db.lock:
+            if user_id is None:
+                result = self.db.conn.execute("SELECT * FROM transactions ORDER BY rowid").fetchall()
+            else:
+                result = self.db.conn.execute(
+                    "SELECT * FROM transactions WHERE user_id = ? ORDER BY rowid", (str(user_id),)
+                ).fetchall()
+        return [dict(row) for row in result]
+
+    def user_frame(self, user_id):
+        df = pd.DataFrame(self.rows(user_id), columns=self.fieldnames)
+        df['amount'] = pd.to_numeric(df['amount'], errors='coerce')
+        return df
+
+
+class SqliteWithdrawalBackend(WithdrawalBackend):
+    def __init__(self, db, fieldnames):
+        self.db = db
+        self.fieldnames = fieldnames
+        self.db.ensure_table("withdrawals", "user_id", fieldnames)
+        self._upsert = _upsert_sql("withdrawals", "user_id", fieldnames)
+
+    def load(self):
+        with self.db.lock:
+            return [dict(row) for row in self.db.conn.execute("SELECT * FROM withdrawals ORDER BY rowid")]
+
+    def get(self, user_id):
+        with self.db.lock:
+            row = self.db.conn.execute(
+                "SELECT * FROM withdrawals WHERE user_id = ?", (str(user_id),)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def save(self, row):
+        with self.db.transaction() as conn:
+            conn.execute(self._upsert, tuple(row.get(f, "") for f in self.fieldnames))
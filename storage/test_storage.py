@@ -0,0 +1,322 @@
+import os
+import threading
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import storage
+from account_store import ACCOUNT_FIELDNAMES, AccountRecord, AccountStore, format_cents, to_cents
+from storage.base import AccountBackend
+from storage.csv_backend import CsvAccountBackend
+from storage.equity_curve import EquityCurve
+from storage.journal_backend import JournalAccountBackend
+from storage.migrate import migrate_accounts
+from storage.sqlite_backend import SqliteAccountBackend, SqliteDatabase
+from storage.ticket_index import TicketIndex
+from storage.trades_store import TradesStore
+from trade_reconciler import TRANSACTION_FIELDNAMES, TransactionLogger
+
+
+@pytest.fixture(params=["csv", "journal", "sqlite"])
+def backend_kind(request):
+    return request.param
+
+
+def make_store(tmp_path, kind):
+    return AccountStore(storage.account_backend(
+        str(tmp_path / "accounts.csv"), ACCOUNT_FIELDNAMES, kind=kind, db_path=str(tmp_path / "test.db")
+    ))
+
+
+def make_account(telegram_id, balance="0.00"):
+    row = {f: "" for f in ACCOUNT_FIELDNAMES}
+    row.update(telegram_id=telegram_id, balance=balance, referral_id=f"REF{telegram_id}")
+    return row
+
+
+def test_account_store_round_trip(tmp_path, backend_kind):
+    store = make_store(tmp_path, backend_kind)
+    store.add(make_account("1", "10.00"))
+    store.add(make_account("2", "20.00"))
+    assert store.flush()
+    # Only the changed row is handed to the backend
+    store.get("2")["balance"] = "25.00"
+    store.mark_dirty("2")
+    assert store.flush()
+
+    reloaded = make_store(tmp_path, backend_kind)
+    assert len(reloaded) == 2
+    assert reloaded.get("1")["balance"] == "10.00"
+    assert reloaded.get("2")["balance"] == "25.00"
+    assert reloaded.find_by_referral("ref1") == "1"
+
+    # Re-adding an account under a new referral code retires the old one
+    reloaded.add(dict(make_account("1", "10.00"), referral_id="NEW1"))
+    assert reloaded.find_by_referral("NEW1") == "1"
+    assert reloaded.find_by_referral("REF1") is None
+
+
+def test_transaction_commits_once_and_discards_on_error(tmp_path, backend_kind):
+    store = make_store(tmp_path, backend_kind)
+    store.add(make_account("1", "10.00"))
+    store.add(make_account("2", "20.00"))
+    store.flush()
+
+    with store.transaction() as txn:
+        txn.account("1").balance -= 5
+        txn.account("2").balance += 5
+        txn.account("2").referrals += 1
+    assert txn.committed
+    assert make_store(tmp_path, backend_kind).get("2")["balance"] == "25.00"
+
+    with pytest.raises(RuntimeError):
+        with store.transaction() as txn:
+            txn.account("1").balance = 0
+            raise RuntimeError("abort")
+    assert store.get("1")["balance"] == "5.00"
+
+
+def test_failed_write_rolls_changes_back(tmp_path):
+    class FailingBackend(CsvAccountBackend):
+        fail = False
+
+        def write(self, rows, deleted_ids=()):
+            if self.fail:
+                raise OSError("disk full")
+            super().write(rows, deleted_ids)
+
+    backend = FailingBackend(str(tmp_path / "accounts.csv"), ACCOUNT_FIELDNAMES)
+    store = AccountStore(backend, flush_delay=60)
+    store.add(make_account("1", "10.00"))
+    store.add(make_account("2", "20.00"))
+    assert store.flush()
+
+    backend.fail = True
+    with store.transaction() as txn:
+        txn.account("1").balance += 5
+    assert not txn.committed
+    assert not store.apply_cents(["1", "2"], {"balance": [100, 200]})
+    assert (store.get("1")["balance"], store.get("2")["balance"]) == ("10.00", "20.00")
+    assert store.total("balance") == 30.0
+
+    # The retried flush writes nothing that was rolled back
+    backend.fail = False
+    assert store.flush()
+    assert AccountStore(CsvAccountBackend(backend.csv_file, ACCOUNT_FIELDNAMES)).get("1")["balance"] == "10.00"
+
+
+def test_journal_replay_and_compaction(tmp_path):
+    csv_file = str(tmp_path / "accounts.csv")
+    store = AccountStore(JournalAccountBackend(csv_file, ACCOUNT_FIELDNAMES))
+    store.add(make_account("1", "10.00"))
+    store.add(make_account("2", "20.00"))
+    store.flush()
+    for balance in ("11.00", "12.00", "13.00"):
+        store.get("1")["balance"] = balance
+        store.mark_dirty("1")
+        store.flush()
+
+    # One record per changed row, nothing for the untouched account
+    with open(f"{csv_file}.journal") as f:
+        assert len(f.readlines()) == 5
+
+    # Startup replays the journal tail and folds it into the snapshot
+    reloaded = AccountStore(JournalAccountBackend(csv_file, ACCOUNT_FIELDNAMES))
+    assert reloaded.get("1")["balance"] == "13.00"
+    with open(f"{csv_file}.journal") as f:
+        assert f.read() == ""
+    with open(csv_file) as f:
+        assert "13.00" in f.read()
+
+
+def test_transaction_status_update(tmp_path, backend_kind):
+    tx_logger = TransactionLogger(backend=storage.transaction_backend(
+        str(tmp_path / "trade_history.csv"), TRANSACTION_FIELDNAMES,
+        kind=backend_kind, db_path=str(tmp_path / "test.db")
+    ))
+    tx_id = tx_logger.log_trade("1", "deposit", 100.0)
+
+    assert tx_logger.update_status(tx_id, "completed")
+    assert not tx_logger.update_status("missing", "completed")
+    assert tx_logger.full_reconciliation() == {"1": 100.0}
+
+
+def test_running_totals_follow_mutations(tmp_path):
+    store = make_store(tmp_path, "csv")
+    store.add(make_account("1", "10.00"))
+    store.add(make_account("2", "20.10"))
+    store.get("1")["balance"] = "5.05"
+    store.mark_dirty("1")
+    with store.transaction() as txn:
+        txn.account("2").total_deposits += 7.5
+    assert store.total("balance") == 25.15
+    assert store.total("total_deposits") == 7.5
+    assert store.verify_totals()
+
+    # Money fields set outright in a bulk update are tracked like the deltas
+    assert store.apply_cents(["1", "2"], {"balance": [100, -10]}, total_deposits=250)
+    assert store.total("balance") == 26.05 and store.total("total_deposits") == 5.0
+    assert store.verify_totals()
+
+    store.replace_all([make_account("3", "1.00")])
+    assert store.total("balance") == 1.0
+
+    # A row changed without mark_dirty drifts until the verification pass
+    store.get("3")["balance"] = "2.00"
+    assert not store.verify_totals()
+    assert store.total("balance") == 2.0
+
+
+def test_account_record_keeps_cents():
+    record = AccountRecord.from_row(make_account("1", "0.10"))
+    for _ in range(3):
+        record.balance += to_cents(0.1)
+    assert record.balance == 40
+    assert record["balance"] == "0.40"
+    assert AccountRecord.from_row({"telegram_id": 7, "balance": "-1.05"}).to_row()["balance"] == "-1.05"
+    assert record.get("missing", "x") == "x"
+    # Formatted without a float round-trip
+    assert [format_cents(cents) for cents in (-5, 0, 2 ** 53 + 1)] == ["-0.05", "0.00", "90071992547409.93"]
+
+
+def test_ticket_index_appends_and_migrates(tmp_path):
+    legacy = tmp_path / "processed_trades.json"
+    legacy.write_text('{"processed_tickets": [30, 10, 20]}')
+    path = str(tmp_path / "tickets.npy")
+
+    index = TicketIndex(path, legacy_json=str(legacy), compact_records=3)
+    assert index.contains([10, 15, 30, 40]).tolist() == [True, False, True, False]
+    assert index.add([40, 10, 5]) == 2
+    with open(f"{path}.log", "ab") as f:
+        f.write(b"\x01\x02")  # torn record
+
+    reloaded = TicketIndex(path, legacy_json=str(legacy))
+    assert len(reloaded) == 5 and 5 in reloaded and 15 not in reloaded
+    assert reloaded.add([6, 7, 8]) == 3
+    assert len(TicketIndex(path)) == 8
+
+
+@pytest.mark.parametrize("partition_format", ["npz", "feather"])
+def test_trades_store_reads_only_touched_months(tmp_path, partition_format):
+    if partition_format == "feather":
+        pytest.importorskip("pyarrow")
+    csv_file = tmp_path / "trades_log.csv"
+    csv_file.write_text(
+        "ticket,symbol,position_type,openprice,closeprice,profit,opentime,closetime,comment\n"
+        "1,EURUSD,buy,1.1,1.2,5.0,2025.06.30,2025-07-01,\n"
+        "2,EURUSD,sell,1.1,1.2,-2.5,2025.07.31,2025-08-10,[sl]\n"
+        "3,,unknown,0,0,100.0,2025.08.11,2025-08-11 09:30:00,deposit\n"
+    )
+    store = TradesStore(str(tmp_path / "trades"), partition_format=partition_format)
+    assert store.import_csv(str(csv_file)) == 3
+    assert store.months() == ["2025-07", "2025-08"]
+
+    august = store.read(date(2025, 8, 1))
+    assert august["ticket"].tolist() == [2, 3]
+    assert august["ticket"].dtype == "int64" and august["symbol"].isna().tolist() == [False, True]
+    assert str(august["closetime"][1]) == "2025-08-11 09:30:00"
+    assert store.read(date(2025, 7, 1), date(2025, 8, 10), columns=["profit"])["profit"].tolist() == [5.0, -2.5]
+
+    # Appends replace by ticket and only rewrite the months they touch
+    store.append(pd.DataFrame({
+        "ticket": [2, 4], "symbol": "EURUSD", "position_type": ["sell", "buy"],
+        "profit": [-3.0, 1.0], "closetime": ["2025-08-10", "2025-09-01"],
+    }))
+    assert store.read(date(2025, 8, 10), date(2025, 8, 10))["profit"].tolist() == [-3.0]
+    assert store.months() == ["2025-07", "2025-08", "2025-09"]
+
+    # The daily rollup follows, counting only buy/sell trades
+    rollup = TradesStore(str(tmp_path / "trades"), partition_format=partition_format).daily_rollup(date(2025, 8, 1))
+    assert rollup["date"].dt.strftime("%Y-%m-%d").tolist() == ["2025-08-10", "2025-09-01"]
+    assert rollup["profit_cents"].tolist() == [-300, 100]
+    assert rollup["wins"].tolist() == [0, 1] and rollup["losses"].tolist() == [1, 0]
+    # The appending store's own copy matches what a fresh load folds from the file
+    assert store.daily_rollup(date(2025, 8, 1)).equals(rollup)
+
+    # A re-import by another process is picked up rather than overwritten
+    TradesStore(str(tmp_path / "trades"), partition_format=partition_format).import_csv(str(csv_file))
+    assert store.daily_rollup()["profit_cents"].tolist() == [500, -250]
+    store.append(pd.DataFrame({
+        "ticket": [5], "symbol": "EURUSD", "position_type": "buy", "profit": [2.0], "closetime": ["2025-08-10"],
+    }))
+    assert TradesStore(str(tmp_path / "trades")).daily_rollup()["profit_cents"].tolist() == [500, -50]
+
+
+def test_trades_store_reads_are_never_partial_during_import(tmp_path):
+    csv_file = tmp_path / "trades_log.csv"
+    pd.DataFrame({
+        "ticket": range(1, 121), "symbol": "EURUSD", "position_type": "buy", "profit": 1.0,
+        "closetime": pd.date_range("2025-01-01", periods=120, freq="3D").strftime("%Y-%m-%d"),
+    }).to_csv(csv_file, index=False)
+    store = TradesStore(str(tmp_path / "trades"))
+    store.import_csv(str(csv_file))
+
+    seen, done = set(), threading.Event()
+
+    def reader():
+        while not done.is_set():
+            seen.add(len(store.read()))
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    try:
+        for _ in range(5):
+            store.import_csv(str(csv_file), chunksize=10)
+    finally:
+        done.set()
+        thread.join()
+    assert seen == {120}
+    assert sorted(os.listdir(tmp_path)) == ["trades", "trades_log.csv"]
+
+
+def test_equity_curve_updates_incrementally(tmp_path):
+    def trades(*rows):
+        return pd.DataFrame(
+            [(i, "EURUSD", "buy", profit, closetime) for i, (closetime, profit) in enumerate(rows)],
+            columns=["ticket", "symbol", "position_type", "profit", "closetime"],
+        )
+
+    path = str(tmp_path / "equity.json")
+    curve = EquityCurve(path, base_cents=10000)
+    assert not curve.initialised and curve.summary()["drawdown"] == 0
+    curve.update(trades(("2025-08-01 10:00", 20.0), ("2025-08-01 12:00", 10.0)))
+    curve.update(trades(("2025-08-02 09:00", -60.0)))
+    curve.update(trades(("2025-08-04", 10.0)))
+    summary = curve.summary()
+    assert summary["cumulative_pl"] == -2000
+    assert (summary["peak"], summary["drawdown"], summary["max_drawdown"]) == (13000, 5000, 6000)
+    assert summary["max_drawdown_pct"] == pytest.approx(6000 / 13000 * 100)
+    assert curve.daily_returns(last=2).round(2).tolist() == [-46.15, 14.29]
+
+    # A trade closing on an earlier day re-folds the curve, which reloads the same from disk
+    curve.update(trades(("2025-07-31", -50.0)))
+    reloaded = EquityCurve(path, base_cents=10000)
+    assert reloaded.summary() == curve.summary()
+    assert reloaded.summary()["peak"] == 10000 and reloaded.summary()["max_drawdown"] == 8000
+
+
+def test_incomplete_backend_fails_on_construction():
+    class NoWrite(AccountBackend):
+        def load(self):
+            return []
+
+    with pytest.raises(TypeError):
+        NoWrite()
+
+
+def test_failed_migration_keeps_the_table(tmp_path, monkeypatch):
+    db = SqliteDatabase(str(tmp_path / "test.db"))
+    csv_file = tmp_path / "accounts.csv"
+    store = AccountStore(storage.account_backend(str(csv_file), ACCOUNT_FIELDNAMES, kind="csv"))
+    store.add(make_account("1"))
+    store.flush()
+    assert migrate_accounts(db, str(csv_file)) == 1
+
+    def failing_write(self, rows, deleted_ids=()):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(SqliteAccountBackend, "write", failing_write)
+    with pytest.raises(OSError):
+        migrate_accounts(db, str(csv_file))
+    assert [row["telegram_id"] for row in SqliteAccountBackend(db, ACCOUNT_FIELDNAMES).load()] == ["1"]
@@ -0,0 +1,118 @@
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _as_tickets(values):
+    return np.asarray(values).astype(np.int64).ravel()
+
+
+class TicketIndex:
+    """Persistent set of ticket numbers.
+
+    The set is kept in memory as a sorted int64 array, so membership is a
+    vectorised searchsorted. On disk it is a sorted .npy snapshot plus an
+    append-only log of raw int64 tickets; adding tickets only appends to the
+    log, which is folded into the snapshot once it holds compact_records
+    entries.
+    """
+
+    def __init__(self, path, legacy_json=None, compact_records=10000):
+        self.path = path
+        self.log_file = f"{path}.log"
+        self.compact_records = compact_records
+        self.lock = threading.Lock()
+        self._tickets = np.empty(0, dtype=np.int64)
+        self._logged = 0
+        self._load(legacy_json)
+
+    def _load(self, legacy_json):
+        parts = []
+        if os.path.exists(self.path):
+            parts.append(np.load(self.path))
+        elif legacy_json and os.path.exists(legacy_json):
+            parts.append(self._read_legacy(legacy_json))
+
+        if os.path.exists(self.log_file):
+            with open(self.log_file, "rb") as f:
+                data = f.read()
+            # Drop a torn final record from a crash mid-append
+            whole = len(data) - len(data) % 8
+            logged = np.frombuffer(data[:whole], dtype=np.int64)
+            parts.append(logged)
+            self._logged = len(logged)
+
+        if parts:
+            self._tickets = np.unique(np.concatenate(parts))
+        if not os.path.exists(self.path) or self._logged:
+            self.compact()
+
+    @staticmethod
+    def _read_legacy(legacy_json):
+        try:
+            with open(legacy_json, "r") as f:
+                tickets = json.load(f).get("processed_tickets", [])
+            logger.info(f"Migrating {len(tickets)} tickets from {legacy_json}")
+            return _as_tickets(tickets)
+        except (ValueError, TypeError) as e:
+            logger.error(f"Could not read {legacy_json}: {e}")
+            return np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._tickets)
+
+    def __contains__(self, ticket):
+        return bool(self.contains([ticket])[0])
+
+    def latest(self):
+        """Highest ticket in the index, or None when it is empty"""
+        return int(self._tickets[-1]) if len(self._tickets) else None
+
+    def contains(self, tickets):
+        """Boolean array telling which of tickets are in the index"""
+        tickets = _as_tickets(tickets)
+        known = self._tickets
+        if not len(known):
+            return np.zeros(len(tickets), dtype=bool)
+        positions = np.minimum(np.searchsorted(known, tickets), len(known) - 1)
+        return known[positions] == tickets
+
+    def add(self, tickets):
+        """Record tickets, appending only the ones not already present"""
+        tickets = np.unique(_as_tickets(tickets))
+        with self.lock:
+            new = tickets[~self.contains(tickets)]
+            if not len(new):
+                return 0
+
+            with open(self.log_file, "ab") as f:
+                f.write(new.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            self._tickets = np.union1d(self._tickets, new)
+            self._logged += len(new)
+
+            if self._logged >= self.compact_records:
+                self.compact()
+            return len(new)
+
+    def compact(self):
+        """Write the full sorted array as the snapshot and empty the log"""
+        tmp_file = f"{self.path}.tmp.npy"
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            np.save(tmp_file, self._tickets)
+            os.replace(tmp_file, self.path)
+            if os.path.exists(self.log_file):
+                os.remove(self.log_file)
+            self._logged = 0
+        except Exception as e:
+            # The log is still on disk and gets replayed on the next start
+            logger.error(f"Error compacting ticket index {self.path}: {e}")
@@ -0,0 +1,352 @@
+"""Closed trades stored by close month, one columnar file per month.
+
+Partitions are Feather files when pyarrow is installed, otherwise
+uncompressed .npz archives of the same typed columns. A date-range read
+only opens the months the range touches.
+
+Convert an existing trades log with:
+
+    python -m storage.trades_store trades_log.csv --root data/trades
+"""
+import argparse
+import logging
+import os
+import re
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+from trade_dates import parse_trade_dates
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow  # noqa: F401
+    PARTITION_FORMAT = "feather"
+except ImportError:
+    PARTITION_FORMAT = "npz"
+
+TRADES_STORE_DIR = os.getenv("TRADES_STORE_DIR", "data/trades")
+
+TRADE_COLUMNS = {
+    "ticket": "int64",
+    "symbol": "object",
+    "position_type": "object",
+    "openprice": "float64",
+    "closeprice": "float64",
+    "profit": "float64",
+    "opentime": "datetime64[ns]",
+    "closetime": "datetime64[ns]",
+    "comment": "object",
+}
+TEXT_COLUMNS = [name for name, dtype in TRADE_COLUMNS.items() if dtype == "object"]
+DATE_COLUMNS = [name for name, dtype in TRADE_COLUMNS.items() if dtype.startswith("datetime")]
+
+ROLLUP_FILE = "daily_rollup.csv"
+ROLLUP_COLUMNS = ["date", "profit_cents", "wins", "losses"]
+_PARTITION_NAME = re.compile(r"^(\d{4}-\d{2})\.(feather|npz)$")
+
+
+def normalize_trades(df: pd.DataFrame) -> pd.DataFrame:
+    """Trades with exactly TRADE_COLUMNS, typed; rows without a ticket or close time are dropped"""
+    data = {}
+    for name, dtype in TRADE_COLUMNS.items():
+        if name not in df:
+            column = pd.Series(np.nan, index=df.index, dtype="object" if dtype == "object" else "float64")
+        else:
+            column = df[name]
+        if name in DATE_COLUMNS:
+            # Parsed once here, at ingest; partitions hold datetime64 columns
+            data[name] = parse_trade_dates(column).to_numpy()
+        elif name in TEXT_COLUMNS:
+            text = column.astype("object")
+            data[name] = text.where(text.notna() & (text.astype(str) != ""), np.nan).to_numpy()
+        else:
+            data[name] = pd.to_numeric(column, errors="coerce").to_numpy()
+
+    trades = pd.DataFrame(data)
+    trades = trades[trades["ticket"].notna() & trades["closetime"].notna()]
+    return trades.astype({"ticket": "int64"}).reset_index(drop=True)
+
+
+def daily_totals(trades: pd.DataFrame) -> pd.DataFrame:
+    """
+    Profit (in cents), wins and losses per close date, over the same trades
+    /tradingstats counts: buy/sell trades with a symbol and a profit.
+    """
+    symbols = trades["symbol"].astype("object")
+    valid = trades[
+        symbols.notna() & (symbols.astype(str).str.strip() != "")
+        & trades["position_type"].isin(["buy", "sell"]) & trades["profit"].notna()
+    ]
+    profit = valid["profit"].to_numpy(dtype=np.float64)
+    totals = pd.DataFrame({
+        "date": valid["closetime"].dt.normalize().to_numpy(),
+        "profit_cents": np.round(profit * 100).astype(np.int64),
+        "wins": (profit > 0).astype(np.int64),
+        "losses": (profit <= 0).astype(np.int64),
+    })
+    return totals.groupby("date", as_index=False).sum()[ROLLUP_COLUMNS]
+
+
+def _negated(totals):
+    return totals.assign(**{name: -totals[name] for name in ROLLUP_COLUMNS[1:]})
+
+
+def _sum_by_date(rows):
+    """One rollup row per date, summing repeated dates and dropping days left without trades"""
+    rollup = rows.groupby("date", as_index=False).sum()[ROLLUP_COLUMNS]
+    return rollup[(rollup["wins"] + rollup["losses"]) > 0].reset_index(drop=True)
+
+
+def _empty_trades():
+    return pd.DataFrame({name: pd.Series(dtype=dtype) for name, dtype in TRADE_COLUMNS.items()})
+
+
+class TradesStore:
+    """
+    Month-partitioned closed trades under root, e.g. data/trades/2025-08.feather.
+
+    Each partition holds one close month, sorted by close time with unique
+    tickets. append() rewrites only the months its trades fall in, and
+    read() only loads the months a date range touches.
+
+    A daily rollup (daily_totals of every stored trade) is kept beside the
+    partitions in daily_rollup.csv, so period statistics never need the
+    trades themselves. An append adds the totals of its trades, less those
+    of the stored trades they replace, as rows appended to the file; rows
+    for the same date are summed, and folded together whenever the file is
+    loaded. The file is reloaded when it changes on disk, e.g. after an
+    import by another process.
+    """
+
+    def __init__(self, root=TRADES_STORE_DIR, partition_format=PARTITION_FORMAT):
+        self.root = root
+        self.partition_format = partition_format
+        self.lock = threading.Lock()
+        self._rollup = None
+        self._rollup_stat = None
+
+    @property
+    def initialised(self):
+        """Whether the store has been created, by import_csv or a first append"""
+        return os.path.isdir(self.root)
+
+    def _path(self, month):
+        return os.path.join(self.root, f"{month}.{self.partition_format}")
+
+    def months(self):
+        """Sorted "YYYY-MM" keys of the existing partitions"""
+        if not self.initialised:
+            return []
+        return sorted({match.group(1) for match in map(_PARTITION_NAME.match, os.listdir(self.root)) if match})
+
+    def _read_partition(self, month, columns=None):
+        for partition_format in (self.partition_format, "feather" if self.partition_format == "npz" else "npz"):
+            path = os.path.join(self.root, f"{month}.{partition_format}")
+            if not os.path.exists(path):
+                continue
+            if partition_format == "feather":
+                return pd.read_feather(path, columns=columns)
+            with np.load(path, allow_pickle=False) as archive:
+                data = {name: archive[name] for name in (columns or TRADE_COLUMNS)}
+            for name in TEXT_COLUMNS:
+                if name in data:
+                    text = data[name].astype(object)
+                    text[text == ""] = np.nan
+                    data[name] = text
+            return pd.DataFrame(data)
+        return None
+
+    def _write_partition(self, month, trades):
+        path = self._path(month)
+        tmp_file = f"{path}.tmp"
+        if self.partition_format == "feather":
+            trades.reset_index(drop=True).to_feather(tmp_file)
+        else:
+            data = {name: trades[name].to_numpy() for name in TRADE_COLUMNS}
+            for name in TEXT_COLUMNS:
+                data[name] = trades[name].fillna("").astype(str).to_numpy(dtype=str)
+            with open(tmp_file, "wb") as f:
+                np.savez(f, **data)
+        os.replace(tmp_file, path)
+
+    def _append(self, df):
+        trades = normalize_trades(df)
+        if trades.empty:
+            return 0
+
+        os.makedirs(self.root, exist_ok=True)
+        self._load_rollup()
+        changes = []
+        months = trades["closetime"].dt.strftime("%Y-%m")
+        for month, new in trades.groupby(months.to_numpy()):
+            new = new.drop_duplicates("ticket", keep="last")
+            changes.append(daily_totals(new))
+            existing = self._read_partition(month)
+            if existing is not None and not existing.empty:
+                replaced = existing["ticket"].isin(new["ticket"]).to_numpy()
+                # Stored trades replaced by the new ones come out of the rollup
+                changes.append(_negated(daily_totals(existing[replaced])))
+                new = pd.concat([existing[~replaced], new], ignore_index=True)
+            self._write_partition(month, new.sort_values("closetime", kind="stable"))
+
+        self._add_to_rollup(pd.concat(changes, ignore_index=True))
+        return len(trades)
+
+    def _rollup_path(self):
+        return os.path.join(self.root, ROLLUP_FILE)
+
+    def _stat_rollup(self):
+        try:
+            stat = os.stat(self._rollup_path())
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load_rollup(self):
+        stat = self._stat_rollup()
+        if self._rollup is not None and stat == self._rollup_stat:
+            return self._rollup
+
+        if stat is not None:
+            rows = pd.read_csv(self._rollup_path(), parse_dates=["date"]).astype({"date": "datetime64[ns]"})
+            rollup = _sum_by_date(rows)
+            if len(rollup) < len(rows):
+                # Fold the appended rows so the next load reads one row per date
+                self._write_rollup(rollup)
+            else:
+                self._rollup, self._rollup_stat = rollup, stat
+        elif self.months():
+            # A store written before the rollup existed
+            parts = [daily_totals(self._read_partition(month)) for month in self.months()]
+            self._write_rollup(_sum_by_date(pd.concat(parts, ignore_index=True)))
+        else:
+            self._rollup, self._rollup_stat = daily_totals(_empty_trades()), None
+        return self._rollup
+
+    def _write_rollup(self, rollup):
+        path = self._rollup_path()
+        rollup.to_csv(f"{path}.tmp", index=False, date_format="%Y-%m-%d")
+        os.replace(f"{path}.tmp", path)
+        self._rollup, self._rollup_stat = rollup, self._stat_rollup()
+
+    def _add_to_rollup(self, changes):
+        """Append per-date changes to the rollup file and fold them into the loaded rollup"""
+        changes = changes.groupby("date", as_index=False).sum()[ROLLUP_COLUMNS]
+        changes = changes[(changes[ROLLUP_COLUMNS[1:]] != 0).any(axis=1)]
+        if changes.empty:
+            return
+        with open(self._rollup_path(), "a", newline="") as f:
+            changes.to_csv(f, header=f.tell() == 0, index=False, date_format="%Y-%m-%d")
+        self._rollup = _sum_by_date(pd.concat([self._rollup, changes], ignore_index=True))
+        self._rollup_stat = self._stat_rollup()
+
+    def daily_rollup(self, start=None, end=None) -> pd.DataFrame:
+        """Rollup rows for the close dates from start to end, both inclusive and optional"""
+        if not self.initialised:
+            return daily_totals(_empty_trades())
+        with self.lock:
+            rollup = self._load_rollup()
+        keep = np.ones(len(rollup), dtype=bool)
+        if start is not None:
+            keep &= (rollup["date"] >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            keep &= (rollup["date"] <= pd.Timestamp(end)).to_numpy()
+        return rollup[keep].reset_index(drop=True)
+
+    def append(self, df: pd.DataFrame, create=True) -> int:
+        """
+        Add trades, replacing any already stored under the same ticket.
+        With create=False nothing is written until the store has been initialised,
+        so a partial store never hides the full trades log.
+        """
+        with self.lock:
+            if not create and not self.initialised:
+                return 0
+            return self._append(df)
+
+    def read(self, start=None, end=None, columns=None) -> pd.DataFrame:
+        """
+        Trades closed between the dates start and end, both inclusive and optional.
+        Only partitions for the months in that range are opened.
+        """
+        load = None if columns is None else list(dict.fromkeys(["closetime", *columns]))
+        # Under the lock, so the partitions listed are still there when they are read
+        with self.lock:
+            months = self.months()
+            if start is not None:
+                months = [m for m in months if m >= f"{start:%Y-%m}"]
+            if end is not None:
+                months = [m for m in months if m <= f"{end:%Y-%m}"]
+            parts = [part for part in (self._read_partition(m, load) for m in months) if part is not None]
+        if not parts:
+            return _empty_trades() if columns is None else _empty_trades()[columns]
+        trades = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+
+        close_dates = trades["closetime"].dt.normalize()
+        keep = np.ones(len(trades), dtype=bool)
+        if start is not None:
+            keep &= (close_dates >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            keep &= (close_dates <= pd.Timestamp(end)).to_numpy()
+        trades = trades[keep].reset_index(drop=True)
+        return trades if columns is None else trades[columns]
+
+    def import_csv(self, csv_file, chunksize=200000) -> int:
+        """
+        Rebuild the store from a trades log CSV, returning the number of trades stored.
+        The new store is built beside root and renamed over it once complete, so
+        readers in other processes see either the old store or the new one.
+        """
+        imported = 0
+        staging = TradesStore(f"{self.root}.importing", self.partition_format)
+        replaced = f"{self.root}.replaced"
+        with self.lock:
+            for leftover in (staging.root, replaced):
+                if os.path.isdir(leftover):
+                    shutil.rmtree(leftover)
+            os.makedirs(staging.root)
+            for chunk in pd.read_csv(csv_file, chunksize=chunksize):
+                imported += staging._append(chunk)
+            # One row per date instead of one per date and chunk
+            staging._write_rollup(staging._load_rollup())
+
+            if os.path.isdir(self.root):
+                os.replace(self.root, replaced)
+            os.replace(staging.root, self.root)
+            self._rollup, self._rollup_stat = staging._rollup, self._stat_rollup()
+        if os.path.isdir(replaced):
+            shutil.rmtree(replaced)
+        logger.info(f"Imported {imported} trades from {csv_file} into {self.root}")
+        return imported
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def trades_store(root=TRADES_STORE_DIR) -> TradesStore:
+    """The process-wide TradesStore for root"""
+    key = os.path.abspath(root)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = TradesStore(key)
+        return _stores[key]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a trades log CSV into the month-partitioned trades store")
+    parser.add_argument("csv_file", nargs="?", default="trades_log.csv")
+    parser.add_argument("--root", default=TRADES_STORE_DIR)
+    args = parser.parse_args()
+
+    store = TradesStore(args.root)
+    imported = store.import_csv(args.csv_file)
+    print(f"✅ Stored {imported} trades in {len(store.months())} {store.partition_format} partitions under {args.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from distribution import allocate_pro_rata, distribute_new_closed_pl
+from mt5.EACommunicator_API import AsyncEACommunicator
+from mt5.simulator import EASimulator
+from storage.ticket_index import TicketIndex
+
+
+def test_shares_sum_exactly_to_total():
+    weights = np.array([10000, 10000, 10000, 0, -500])
+    shares = allocate_pro_rata(weights, 100)
+    assert shares.tolist() == [34, 33, 33, 0, 0]
+    assert allocate_pro_rata(weights, -100).tolist() == [-34, -33, -33, 0, 0]
+
+
+def test_large_pool_keeps_the_total():
+    rng = np.random.default_rng(1)
+    weights = rng.integers(1, 10 ** 9, size=100_000)
+    for total in (123_456_789, -7, 10 ** 12):
+        assert int(allocate_pro_rata(weights, total).sum()) == total
+
+
+def test_nothing_to_share():
+    assert allocate_pro_rata(np.array([0, -1]), 500).tolist() == [0, 0]
+    assert allocate_pro_rata(np.array([5, 5]), 0).tolist() == [0, 0]
+
+
+def test_small_closes_add_up_until_distributed(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # distributions append to trades_log.csv
+
+    class Accounts:
+        def __init__(self):
+            self.processed = TicketIndex(str(tmp_path / "processed.npy"))
+            self.shared = []
+
+        def is_processed(self, tickets):
+            return self.processed.contains(tickets)
+
+        def mark_processed(self, tickets):
+            self.processed.add(tickets)
+
+        def share_closed_pl(self, closed_pl):
+            self.shared.append(closed_pl)
+            return True
+
+    simulator = EASimulator(open_positions=0, closed_positions=0).start(0)
+    ea = AsyncEACommunicator()
+    ea.Connect("127.0.0.1", simulator.port)
+    accounts = Accounts()
+
+    async def main():
+        # Sub-$1 closes, each a second apart so a cursor moved on fetch would skip the first
+        for profit in (0.4, 0.3):
+            simulator.close_trades(profit=profit)
+            assert await distribute_new_closed_pl(ea, accounts) is None
+            await asyncio.sleep(1.1)
+        # They are fetched again and shared with the next close
+        simulator.close_trades(profit=2.0)
+        assert await distribute_new_closed_pl(ea, accounts) == (2.7, 3)
+        assert await distribute_new_closed_pl(ea, accounts) is None
+
+    try:
+        asyncio.run(main())
+    finally:
+        ea.socket.close(linger=0)
+        ea.context.term()
+        simulator.stop()
+    assert accounts.shared == [2.7]
+    assert len(accounts.processed) == 3
+    # Every fetched close is logged once, including those not shared yet
+    assert len(pd.read_csv(tmp_path / "trades_log.csv")) == 3
@@ -0,0 +1,44 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from period_stats import day_numbers, performance_breakdown, period_totals, trade_period_totals
+
+PERIODS = {
+    "today": (date(2025, 8, 11), date(2025, 8, 11)),
+    "week": (date(2025, 8, 11), None),
+    "last_month": (date(2025, 7, 1), date(2025, 7, 31)),
+    "future": (date(2026, 1, 1), None),
+}
+
+
+def test_trades_bucketed_into_every_period():
+    closetime = pd.to_datetime(["2025-07-01 09:00", "2025-07-31 23:59", "2025-08-11 10:00", "2025-08-12 00:00", None])
+    profit = [1.25, -0.5, 2.0, 0.0, 9.0]
+    totals = trade_period_totals(closetime, profit, PERIODS)
+    assert totals == {
+        "today": (200, 1, 0),
+        "week": (200, 1, 1),
+        "last_month": (75, 1, 1),
+        "future": (0, 0, 0),
+    }
+
+
+def test_rollup_rows_and_missing_data():
+    days = day_numbers([date(2025, 8, 10), date(2025, 8, 11)])
+    assert days.tolist() == [20310, 20311]
+    totals = period_totals(days, [500, -300], [2, 0], [1, 1], PERIODS)
+    assert totals["week"] == (-300, 0, 1)
+    assert period_totals(np.array([], dtype=np.int64), [], [], [], PERIODS)["today"] == (0, 0, 0)
+    assert trade_period_totals(pd.to_datetime(["2025-08-11"]), [np.nan], PERIODS)["today"] == (0, 0, 0)
+
+
+def test_breakdown_by_symbol_and_direction():
+    by_symbol, by_direction = performance_breakdown(
+        ["EURUSD", "EURUSD", "GBPUSD", None, "XAUUSD"], ["buy", "sell", "buy", "buy", "unknown"], [10, -4, 0, 5, 1]
+    )
+    assert by_symbol.index.tolist() == ["EURUSD", "GBPUSD"]
+    assert by_symbol.loc["EURUSD"].tolist() == [2, 6.0, 50.0, 10.0, -4.0]
+    assert by_direction.loc["buy"].tolist() == [2, 10.0, 50.0, 10.0, 0.0]
+    assert by_direction.loc["sell", "avg_loss"] == -4.0
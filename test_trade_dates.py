@@ -0,0 +1,51 @@
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+import trade_dates
+from trade_dates import parse_trade_dates
+
+
+def test_mixed_layouts_parse_once():
+    values = pd.Series(["2025.07.31", "2025-08-10", None, "2025-08-10 11:30:00", "bad", "2025-08-10T11:30:00+02:00"])
+    parsed = parse_trade_dates(values)
+    assert parsed.dtype == "datetime64[ns]"
+    assert [str(value) for value in parsed] == [
+        "2025-07-31 00:00:00", "2025-08-10 00:00:00", "NaT", "2025-08-10 11:30:00", "NaT", "2025-08-10 09:30:00"
+    ]
+    assert trade_dates._parsed["2025.07.31"] == np.datetime64("2025-07-31")
+
+    # Already parsed columns pass straight through
+    assert parse_trade_dates(parsed).equals(parsed)
+
+
+def test_concurrent_parses_survive_cache_clears(monkeypatch):
+    # A limit this small clears the shared cache on nearly every call
+    monkeypatch.setattr(trade_dates, "_CACHE_LIMIT", 50)
+    switch_interval = sys.getswitchinterval()
+    # Switch threads often, so a clear can land between another call's update and lookup
+    sys.setswitchinterval(1e-6)
+    days = pd.date_range("2025-01-01", periods=400).strftime("%Y-%m-%d")
+    expected = pd.to_datetime(days).to_numpy()
+    errors = []
+
+    def worker(offset):
+        try:
+            for _ in range(30):
+                for start in range(offset, 360, 40):
+                    parsed = parse_trade_dates(pd.Series(days[start:start + 40]))
+                    assert (parsed.to_numpy() == expected[start:start + 40]).all()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(8)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    assert errors == []
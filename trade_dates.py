@@ -0,0 +1,74 @@
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Layouts seen in trades_log.csv and the EA replies, keyed by the string with every digit as 9
+KNOWN_FORMATS = {
+    "9999-99-99": "%Y-%m-%d",
+    "9999.99.99": "%Y.%m.%d",
+    "9999-99-99 99:99": "%Y-%m-%d %H:%M",
+    "9999.99.99 99:99": "%Y.%m.%d %H:%M",
+    "9999-99-99 99:99:99": "%Y-%m-%d %H:%M:%S",
+    "9999.99.99 99:99:99": "%Y.%m.%d %H:%M:%S",
+    "9999-99-99T99:99:99": "%Y-%m-%dT%H:%M:%S",
+}
+
+_DIGITS = re.compile(r"\d")
+_CACHE_LIMIT = 100_000
+# Parsed value of every distinct timestamp string seen so far, shared by to_thread workers
+_parsed = {}
+_parsed_lock = threading.Lock()
+
+
+def _parse_strings(strings):
+    """datetime64[ns] for distinct strings, parsing each layout group with its exact format"""
+    patterns = pd.Series([_DIGITS.sub("9", s) for s in strings], dtype=object)
+    values = pd.Series(strings, dtype=object)
+    result = np.full(len(strings), np.datetime64("NaT"), dtype="datetime64[ns]")
+    for pattern, positions in patterns.groupby(patterns).groups.items():
+        group = values[positions]
+        fmt = KNOWN_FORMATS.get(pattern)
+        if fmt:
+            parsed = pd.to_datetime(group, format=fmt, errors="coerce")
+        else:
+            # Anything else is inferred element by element; offsets are converted to naive UTC
+            parsed = pd.to_datetime(group, format="mixed", errors="coerce", utc=True).dt.tz_localize(None)
+        result[positions] = parsed.to_numpy(dtype="datetime64[ns]")
+    return result
+
+
+def parse_trade_dates(values) -> pd.Series:
+    """
+    Parse trade timestamps that mix layouts ("2025.07.31", "2025-08-10",
+    "2025-08-10 11:30:00", ...) into a naive datetime64[ns] Series.
+
+    Each distinct string is parsed once, with the exact format of its layout,
+    and remembered; unparseable values become NaT. Columns that are already
+    datetimes are returned as they are.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        if getattr(series.dt, "tz", None) is not None:
+            series = series.dt.tz_convert(None)
+        return series.astype("datetime64[ns]")
+
+    codes, uniques = pd.factorize(series.astype(object), use_na_sentinel=True)
+    uniques = [str(value).strip() for value in uniques]
+    # The result is built from this local copy, so another thread clearing the cache can't break it
+    with _parsed_lock:
+        known = {value: _parsed[value] for value in uniques if value in _parsed}
+    missing = [value for value in uniques if value not in known]
+    if missing:
+        known.update(zip(missing, _parse_strings(missing)))
+        with _parsed_lock:
+            if len(_parsed) + len(missing) > _CACHE_LIMIT:
+                _parsed.clear()
+                _parsed.update(known)
+            else:
+                _parsed.update((value, known[value]) for value in missing)
+
+    parsed = np.array([known[value] for value in uniques] + [np.datetime64("NaT")], dtype="datetime64[ns]")
+    # Missing values have code -1, which picks the trailing NaT
+    return pd.Series(parsed[codes], index=series.index, name=series.name)